@@ -1,20 +1,73 @@
 import argparse
+import glob
+import json
+import os
+import random
+import sys
+import string
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-def parse(path):
+STAR = ord('*')
+
+class Grid:
+
+    __slots__ = ('cells', 'width', 'height', 'stride')
+
+    def __init__(self, cells, width, height):
+
+        # one byte per letter, row by row; a zero byte after every row and a
+        # zero row above and below the grid act as borders, so neighbours
+        # never need a bounds check
+        self.cells = cells
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+
+    @classmethod
+    def from_rows(cls, rows):
+
+        width = len(rows[0]) if rows else 0
+
+        cells = bytearray(width + 1)
+        for row in rows:
+            cells += ''.join(row).encode()
+            cells.append(0)
+        cells += bytes(width + 1)
+
+        return cls(cells, width, len(rows))
+
+    def index(self, i, j):
+        return (i + 1) * self.stride + j
+
+    def rows(self):
+        return [list(self.cells[self.index(i, 0):self.index(i, self.width)].decode()) for i in range(self.height)]
+
+    def copy(self):
+        return Grid(bytearray(self.cells), self.width, self.height)
+
+    def flag(self):
+        return self.cells.translate(None, b'*\0').decode()
+
+def read_lines(path):
 
     with open(path, 'r') as f:
-        lines = f.readlines()
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
 
-    grid = []
+def parse(path):
+
+    cells = bytearray()
+    width = 0
+    height = 0
     wordlist = []
     is_grid = True
 
-    for line in lines:
-
-        line = line.strip()
-
-        if not line:
-            continue
+    for line in read_lines(path):
 
         if line == 'Grid:':
             continue
@@ -24,11 +77,42 @@ def parse(path):
             continue
 
         if is_grid:
-            grid.append(line.split())
+            row = ''.join(line.split()).encode()
+            if not height:
+                width = len(row)
+                cells += bytes(width + 1)
+            cells += row
+            cells.append(0)
+            height += 1
         else:
             wordlist.append(line)
 
-    return grid, wordlist
+    cells += bytes(width + 1)
+
+    return Grid(cells, width, height), wordlist
+
+def find_puzzles(pattern):
+
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+
+    for path in sorted(glob.iglob(pattern)):
+        if os.path.isfile(path):
+            yield path
+
+def solve_file(path, solver):
+
+    start = time.perf_counter()
+    grid, wordlist = parse(path)
+    flag = solver(grid, wordlist)
+
+    return {'path': path, 'password': flag, 'time': round(time.perf_counter() - start, 6)}
+
+def batch(pattern, solver, workers, out):
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(partial(solve_file, solver=solver), find_puzzles(pattern), chunksize=16):
+            out.write(json.dumps(result) + '\n')
 
 def horizontal_dfs(grid, word, i, j, c, can_bend):
 
@@ -122,42 +206,374 @@ def diagonal_search(grid, word, i, j):
     diagonal_dfs(grid, word, i, j, 1, 1, 0)
     
     
+def bend_search(grid, moves, word, p, vertical, stack):
+
+    cells = grid.cells
+    last = len(word) - 1
+
+    if cells[p] != word[0]:
+        return False
+
+    cells[p] = STAR
+
+    if last == 0:
+        return True
+
+    pos, step, axis, bend = stack
+
+    pos[0] = p
+    step[0] = 0
+    axis[0] = 1 if vertical else 0
+    bend[0] = True
+
+    c = 0
+    while c >= 0:
+
+        d = step[c]
+
+        if d == (4 if bend[c] else 2):
+            cells[pos[c]] = word[c]
+            c -= 1
+            continue
+
+        step[c] = d + 1
+
+        q = pos[c] + moves[axis[c]][d]
+        if cells[q] != word[c+1]:
+            continue
+
+        cells[q] = STAR
+
+        if c + 1 == last:
+            return True
+
+        c += 1
+        pos[c] = q
+        step[c] = 0
+        if d < 2:
+            axis[c] = axis[c-1]
+            bend[c] = bend[c-1]
+        else:
+            axis[c] = 1 - axis[c-1]
+            bend[c] = False
+
+    return False
+
+def diagonal_scan(grid, word, p, d):
+
+    cells = grid.cells
+    stride = grid.stride
+
+    q = p
+    for c in range(len(word)):
+        if c > 0 and d < 0 and q < 2 * stride:
+            return False
+        if cells[q] != word[c]:
+            return False
+        q += d
+
+    for c in range(len(word)):
+        cells[p + c*d] = STAR
+
+    return True
+
 def solve(grid, wordlist):
 
+    cells = grid.cells
+    stride = grid.stride
+
+    moves = ((1, -1, -stride, stride), (stride, -stride, -1, 1))
+    diagonals = (-stride - 1, -stride + 1, stride - 1, stride + 1)
+
+    longest = max(map(len, wordlist), default=0)
+    stack = ([0] * longest, [0] * longest, [0] * longest, [False] * longest)
+
+    for word in wordlist:
+
+        word = word.encode()
+
+        p = cells.find(word[0])
+        while p != -1:
+
+            if not bend_search(grid, moves, word, p, False, stack) and not bend_search(grid, moves, word, p, True, stack):
+                for d in diagonals:
+                    if diagonal_scan(grid, word, p, d):
+                        break
+
+            p = cells.find(word[0], p + 1)
+
+    return grid.flag()
+
+def shifted_equal(flat, s, value):
+
+    # mask[p] is flat[p + s] == value, False where p + s falls outside
+    mask = np.zeros(len(flat), dtype=bool)
+
+    if abs(s) >= len(flat):
+        return mask
+
+    if s >= 0:
+        mask[:len(flat)-s] = flat[s:] == value
+    else:
+        mask[-s:] = flat[:s] == value
+
+    return mask
+
+def line_starts(flat, word, d):
+
+    mask = flat == word[0]
+    for c in range(1, len(word)):
+        mask &= shifted_equal(flat, c * d, word[c])
+
+    return mask
+
+def bent_starts(flat, stride, word):
+
+    mask = np.zeros(len(flat), dtype=bool)
+
+    for a, turns in [(1, (-stride, stride)), (-1, (-stride, stride)), (-stride, (-1, 1)), (stride, (-1, 1))]:
+        third = shifted_equal(flat, 2 * a, word[2])
+        for b in turns:
+            third |= shifted_equal(flat, a + b, word[2])
+        mask |= shifted_equal(flat, a, word[1]) & third
+
+    return mask & (flat == word[0])
+
+def numpy_solve(grid, wordlist):
+
+    cells = grid.cells
+    stride = grid.stride
+    flat = np.frombuffer(cells, dtype=np.uint8)
+
+    moves = ((1, -1, -stride, stride), (stride, -stride, -1, 1))
+    lines = (1, -1, -stride, stride, -stride - 1, -stride + 1, stride - 1, stride + 1)
+
+    longest = max(map(len, wordlist), default=0)
+    stack = ([0] * longest, [0] * longest, [0] * longest, [False] * longest)
+
+    for word in wordlist:
+
+        word = word.encode()
+        last = len(word) - 1
+
+        straight = []
+        for d in lines:
+            mask = line_starts(flat, word, d)
+            if last and d in (-stride - 1, -stride + 1):
+                mask[:2*stride - last*d] = False
+            straight.append(mask)
+
+        candidates = np.logical_or.reduce(straight)
+
+        # only starts that could begin a path of three or more orthogonal
+        # cells need the DFS, everything else is a plain line
+        if last >= 2:
+            bent = bent_starts(flat, stride, word)
+            candidates |= bent
+        else:
+            bent = np.zeros(len(flat), dtype=bool)
+
+        for p in np.flatnonzero(candidates).tolist():
+
+            if bent[p]:
+                if not bend_search(grid, moves, word, p, False, stack) and not bend_search(grid, moves, word, p, True, stack):
+                    for d in lines[4:]:
+                        if diagonal_scan(grid, word, p, d):
+                            break
+                continue
+
+            for k in range(len(lines)):
+                if straight[k][p]:
+                    path = range(p, p + len(word) * lines[k], lines[k])
+                    if all(cells[q] != STAR for q in path):
+                        for q in path:
+                            cells[q] = STAR
+                        break
+
+    return grid.flag()
+
+def build_trie(wordlist):
+
+    trie = {}
+
+    for word in wordlist:
+        node = trie
+        for c in word.encode():
+            node = node.setdefault(c, {})
+        node[None] = word
+
+    return trie
+
+def trie_bend_dfs(cells, moves, node, p, axis, can_bend, path, matches):
+
+    node = node.get(cells[p])
+    if node is None:
+        return
+
+    path.append(p)
+
+    if None in node:
+        matches.append((node[None], tuple(path)))
+
+    for d in range(4 if can_bend else 2):
+
+        q = p + moves[axis][d]
+
+        if len(path) > 1 and q == path[-2]:
+            continue
+
+        if d < 2:
+            trie_bend_dfs(cells, moves, node, q, axis, can_bend, path, matches)
+        else:
+            trie_bend_dfs(cells, moves, node, q, 1 - axis, False, path, matches)
+
+    path.pop()
+
+def trie_diagonal_walk(grid, node, p, d, matches):
+
+    path = []
+
+    while True:
+
+        node = node.get(grid.cells[p])
+        if node is None:
+            return
+
+        path.append(p)
+
+        if None in node:
+            matches.append((node[None], tuple(path)))
+
+        p += d
+
+        if d < 0 and p < 2 * grid.stride:
+            return
+
+def trie_solve(grid, wordlist):
+
+    trie = build_trie(wordlist)
+
+    cells = grid.cells
+    stride = grid.stride
+
+    moves = ((1, -1, -stride, stride), (stride, -stride, -1, 1))
+    diagonals = (-stride - 1, -stride + 1, stride - 1, stride + 1)
+
+    # every candidate path is collected in the order the per-word search
+    # would try it, so replaying them per word marks the same cells
+    found = {}
+
+    for p in range(stride, len(cells) - stride):
+
+        if cells[p] not in trie:
+            continue
+
+        matches = []
+        trie_bend_dfs(cells, moves, trie, p, 0, True, [], matches)
+        trie_bend_dfs(cells, moves, trie, p, 1, True, [], matches)
+        for d in diagonals:
+            trie_diagonal_walk(grid, trie, p, d, matches)
+
+        for word, path in matches:
+            found.setdefault(word, []).append(path)
+
     for word in wordlist:
-        for i in range(len(grid)):
-            for j in range(len(grid[0])):
-                if grid[i][j] == word[0]:
-                    horizontal_dfs(grid, word, i, j, 0, True)
-                    vertical_dfs(grid, word, i, j, 0, True)
-                    diagonal_search(grid, word, i, j)
+        for path in found.get(word, []):
+            if all(cells[q] != STAR for q in path):
+                for q in path:
+                    cells[q] = STAR
 
-    flag = ''
-    for row in grid:
-        for c in row:
-            if c != '*':
-                flag += c
+    return grid.flag()
 
-    return flag     
+def recursive_solve(grid, wordlist):
+
+    rows = grid.rows()
+
+    for word in wordlist:
+        for i in range(len(rows)):
+            for j in range(len(rows[0])):
+                if rows[i][j] == word[0]:
+                    horizontal_dfs(rows, word, i, j, 0, True)
+                    vertical_dfs(rows, word, i, j, 0, True)
+                    diagonal_search(rows, word, i, j)
+
+    grid.cells[:] = Grid.from_rows(rows).cells
+
+    return grid.flag()
+
+def benchmark(size, count, seed=0):
+
+    random.seed(seed)
+
+    rows = [[random.choice(string.ascii_uppercase) for _ in range(size)] for _ in range(size)]
+
+    wordlist = []
+    for _ in range(count):
+        i = random.randrange(size)
+        j = random.randrange(size - 8)
+        wordlist.append(''.join(rows[i][j:j+random.randint(4, 8)]))
+
+    grid = Grid.from_rows(rows)
+
+    print(f'{size}x{size} grid, {count} words')
+
+    for name, solver in [('recursive', recursive_solve), ('iterative', solve), ('trie', trie_solve), ('numpy', numpy_solve)]:
+        start = time.perf_counter()
+        flag = solver(grid.copy(), wordlist)
+        print(f'{name}: {time.perf_counter() - start:.3f}s ({len(flag)} letters left)')
 
 def main():
 
     parser = argparse.ArgumentParser(description='First challenge')
-    parser.add_argument('path', help='Path to input file')
+    parser.add_argument('path', nargs='?', default=None, help='Path to input file')
+    parser.add_argument('--trie', action='store_true', help='Match all words at once with a prefix trie')
+    parser.add_argument('--recursive', action='store_true', help='Use the recursive DFS search')
+    parser.add_argument('--numpy', action='store_true', help='Find straight and diagonal words with NumPy before the DFS')
+    parser.add_argument('--benchmark', type=int, metavar='SIZE', help='Time the searches on a random SIZExSIZE grid')
+    parser.add_argument('--batch', metavar='PATTERN', help='Solve every puzzle in a directory or glob, one JSON line each')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --batch')
+    parser.add_argument('--output', default=None, help='Write --batch results to this file instead of stdout')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not echo the grid and words')
     args = parser.parse_args()
     path = args.path
 
+    if args.trie:
+        solver = trie_solve
+    elif args.recursive:
+        solver = recursive_solve
+    elif args.numpy:
+        solver = numpy_solve
+    else:
+        solver = solve
+
+    if args.benchmark:
+        benchmark(args.benchmark, 50)
+        return
+
+    if args.batch:
+        if args.output:
+            with open(args.output, 'w') as out:
+                batch(args.batch, solver, args.workers, out)
+        else:
+            batch(args.batch, solver, args.workers, sys.stdout)
+        return
+
+    if not path:
+        parser.error('path is required')
+
     grid, wordlist = parse(path)
 
-    print('\nGrid:')
-    for row in grid:
-        print(row)
+    if not args.quiet:
 
-    print('\nWords:')
-    for word in wordlist:
-        print(word)
+        print('\nGrid:')
+        for row in grid.rows():
+            print(row)
+
+        print('\nWords:')
+        for word in wordlist:
+            print(word)
 
-    flag = solve(grid, wordlist)
+    flag = solver(grid, wordlist)
     print('\npassword:')
     print(flag)
     
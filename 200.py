@@ -1,4 +1,18 @@
 import argparse
+import copy
+import glob
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+HOLE = ord('&')
+DOT = ord('.')
 
 def parse(path):
 
@@ -15,17 +29,24 @@ def parse(path):
 def valid(i, j, grid):
     return i >= 0 and i < len(grid) and j >= 0 and j < len(grid[0])
     
-def count_neighbors(i, j, grid, c):
+MOORE = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+def home_cells(grid):
+
+    # only the last A and the last B (row by row) are restored every
+    # generation; any other A or B evolves like an empty cell
+    homes = {}
+    last = {}
 
-    di = [-1, -1, -1, 0, 0, 1, 1, 1]
-    dj = [-1, 0, 1, -1, 1, -1, 0, 1]
+    for i in range(len(grid)):
+        for j in range(len(grid[0])):
+            if grid[i][j] == 'A' or grid[i][j] == 'B':
+                last[grid[i][j]] = (i, j)
 
-    count = 0
-    for k in range(8):
-        if valid(i + di[k], j + dj[k], grid) and grid[i + di[k]][j + dj[k]] == c:
-            count += 1
+    for c, cell in last.items():
+        homes[cell] = c
 
-    return count
+    return homes
 
 def generate_portal_grid(grid):
 
@@ -53,149 +74,1000 @@ def generate_portal_grid(grid):
 
     return portal_grid
 
-def simulate(initial_grid):
+def count_grid(grid, c):
 
-    n = len(initial_grid)
-    m = len(initial_grid[0])
-
-    grid = [initial_grid]
-    lim = n * m
+    n = len(grid)
+    m = len(grid[0])
 
-    portal_grid = []
-    portal_grid.append(generate_portal_grid(grid[0]))
+    hits = [[1 if x == c else 0 for x in row] for row in grid]
+    triples = [[a + b + d for a, b, d in zip([0] + row[:-1], row, row[1:] + [0])] for row in hits]
 
+    zero = [0] * m
+    counts = []
     for i in range(n):
-        for j in range(m):
+        above = triples[i-1] if i > 0 else zero
+        below = triples[i+1] if i + 1 < n else zero
+        counts.append([a + b + d - e for a, b, d, e in zip(above, triples[i], below, hits[i])])
+
+    return counts
+
+def pair_portals(cells):
+
+    # same pairing as generate_portal_grid for one letter's cells, given in
+    # row-major order
+    pairs = {}
+
+    if len(cells) > 1:
+        for cell in cells[1:]:
+            pairs[cell] = cells[0]
+        pairs[cells[0]] = cells[-1]
+
+    return pairs
+
+def next_state(c, black_holes, home):
+
+    if c == '&':
+        return '&' if black_holes == 2 or black_holes == 3 else '.'
+
+    if black_holes >= 3:
+        return '&'
+
+    return home or c
+
+class Evolution:
+
+    def __init__(self, initial_grid):
+
+        self.n = len(initial_grid)
+        self.m = len(initial_grid[0])
+
+        self.frame = initial_grid
+        self.portals = generate_portal_grid(initial_grid)
+
+        self.homes = {}
+        self.portal_cells = {}
+
+        for i in range(self.n):
+            for j in range(self.m):
+
+                if initial_grid[i][j].islower():
+                    self.portal_cells.setdefault(initial_grid[i][j], []).append((i, j))
+
+        for (i, j), c in home_cells(initial_grid).items():
+            self.homes[(i, j)] = c
+
+        # pre holds the last generation before portal changes were turned
+        # into black holes. Only cells that changed, or whose black hole
+        # count changed, can evolve differently from the previous generation.
+        self.pre = [row[:] for row in initial_grid]
+        self.counts = None
+        self.dirty = None
+        self.overridden = []
+
+        # zobrist hash of (frame, pre) to spot fixed points and cycles
+        self.key = 0
+        for i in range(self.n):
+            for j in range(self.m):
+                self.key ^= hash((i, j, self.frame[i][j])) ^ hash((i, j, self.pre[i][j], 0))
+
+    def copy(self):
+
+        other = copy.copy(self)
+        other.pre = [row[:] for row in self.pre]
+        other.overridden = list(self.overridden)
+        other.portal_cells = dict(self.portal_cells)
+        other.counts = None
+        other.dirty = None
+
+        return other
+
+    def rows(self):
+        return self.frame
+
+    def portal_grid(self):
+        return self.portals
+
+    def frame_data(self):
+        return (self.frame, self.portals)
+
+    def update_portals(self, touched, pre_changed):
+
+        pre = self.pre
+        updates = {}
+        pairings = []
+
+        # only the letters whose cells were covered or uncovered are paired
+        # again; every other portal keeps its partner
+        for p in touched:
+
+            cells = self.portal_cells.get(p, [])
+
+            for cell in cells:
+                updates[cell] = (-1, -1)
 
-            if grid[0][i][j] == 'A':
-                si, sj = i, j
+            cells = [(i, j) for i, j in cells if pre[i][j] == p]
+            cells += [(i, j) for i, j, c in pre_changed if pre[i][j] == p and c != p]
+            cells.sort()
 
-            if grid[0][i][j] == 'B':
-                ei, ej = i, j
+            self.portal_cells[p] = cells
+            pairings.append(pair_portals(cells))
+
+        for pairs in pairings:
+            updates.update(pairs)
+
+        portals = self.portals[:]
+        copied = set()
+        changed = []
+
+        for (i, j), partner in updates.items():
+
+            if portals[i][j] == partner:
+                continue
+
+            if i not in copied:
+                portals[i] = portals[i][:]
+                copied.add(i)
+
+            portals[i][j] = partner
+            changed.append((i, j))
+
+        self.portals = portals
+
+        return changed
+
+    def step(self):
+
+        n = self.n
+        m = self.m
+        prev = self.frame
+        pre = self.pre
+        key = self.key
+
+        # when most of the board moves, a full recount is cheaper
+        if self.dirty is None:
+            self.counts = count_grid(prev, '&')
+            self.dirty = [(i, j) for i in range(n) for j in range(m)]
+
+        counts = self.counts
+
+        pre_changed = []
+        for i, j in self.dirty:
+            c = next_state(prev[i][j], counts[i][j], self.homes.get((i, j)))
+            if c != pre[i][j]:
+                pre_changed.append((i, j, pre[i][j]))
+                key ^= hash((i, j, pre[i][j], 0)) ^ hash((i, j, c, 0))
+                pre[i][j] = c
+
+        candidates = [(i, j) for i, j, _ in pre_changed] + self.overridden
+        overridden = []
+
+        touched = {c for _, _, c in pre_changed if c.islower()}
+        touched |= {pre[i][j] for i, j, _ in pre_changed if pre[i][j].islower()}
+
+        if touched:
+            overridden = self.update_portals(touched, pre_changed)
+            candidates += overridden
+
+        # unchanged rows are shared with the previous frame
+        frame = prev[:]
+        copied = set()
+        blocked = set(overridden)
+        dirty = set() if 9 * len(candidates) < n * m else None
+
+        for i, j in candidates:
+
+            c = '&' if (i, j) in blocked else pre[i][j]
+            if c == frame[i][j]:
+                continue
+
+            if i not in copied:
+                frame[i] = frame[i][:]
+                copied.add(i)
+
+            if dirty is not None:
+                if (c == '&') != (frame[i][j] == '&'):
+                    delta = 1 if c == '&' else -1
+                    for di, dj in MOORE:
+                        if 0 <= i + di < n and 0 <= j + dj < m:
+                            counts[i + di][j + dj] += delta
+                            dirty.add((i + di, j + dj))
+                dirty.add((i, j))
+
+            key ^= hash((i, j, frame[i][j])) ^ hash((i, j, c))
+            frame[i][j] = c
+
+        self.frame = frame
+        self.overridden = overridden
+        self.dirty = dirty
+        self.key = key
+
+def start_evolution(initial_grid, backend):
+
+    if backend == 'numpy':
+        return NumpyEvolution(initial_grid)
+
+    if backend == 'bits':
+        return BitEvolution(initial_grid)
+
+    return Evolution(initial_grid)
+
+def simulate(initial_grid, lim=None, backend='lists'):
+
+    evolution = start_evolution(initial_grid, backend)
+    lim = lim or len(initial_grid) * len(initial_grid[0])
+
+    grid = [initial_grid]
+    portal_grid = [evolution.portal_grid()]
+    seen = {evolution.key: 0}
 
     for k in range(1, lim):
 
-        grid.append([['.' for _ in range(m)] for _ in range(n)])
+        evolution.step()
 
-        for i in range(n):
-            for j in range(m):
-                
-                black_holes = count_neighbors(i, j, grid[k-1], '&')
+        grid.append(evolution.rows())
+        portal_grid.append(evolution.portal_grid())
 
-                if grid[k-1][i][j] == '&':
-                    if black_holes == 2 or black_holes == 3:
-                        grid[k][i][j] = '&'
-                    continue
+        if evolution.key in seen:
+            start = seen[evolution.key]
+            if grid[start] == grid[k] and portal_grid[start] == portal_grid[k]:
+                period = k - start
+                for t in range(k + 1, lim):
+                    grid.append(grid[start + (t - start) % period])
+                    portal_grid.append(portal_grid[start + (t - start) % period])
+                break
 
-                if grid[k-1][i][j] != '&' and black_holes >= 3:
-                        grid[k][i][j] = '&'
-                else:
-                    if i == si and j == sj:
-                        grid[k][i][j] = 'A'
-                    elif i == ei and j == ej:
-                        grid[k][i][j] = 'B'
+        seen[evolution.key] = k
+
+    return grid, portal_grid
+
+class Timeline:
+
+    def __init__(self, evolution, lim, window=64, every=32):
+
+        self.evolution = evolution
+        self.lim = lim
+        self.window = window
+        self.every = every
+
+        # the evolution sits at generation k; every `every` generations a
+        # copy of it is kept so earlier frames can be recomputed on demand
+        self.k = 0
+        self.furthest = 0
+        self.checkpoints = {0: evolution.copy()}
+        self.cache = OrderedDict()
+        self.last = None
+
+        self.seen = {evolution.key: 0}
+        self.cycle = None
+
+    def __len__(self):
+        return self.lim
+
+    def replay(self, k):
+
+        c = (min(k, self.furthest) // self.every) * self.every
+
+        if not c <= self.k <= k:
+            self.evolution = self.checkpoints[c].copy()
+            self.k = c
+
+        while self.k < k:
+
+            self.evolution.step()
+            self.k += 1
+
+            if self.k <= self.furthest:
+                continue
+
+            self.furthest = self.k
+
+            if self.k % self.every == 0:
+                self.checkpoints[self.k] = self.evolution.copy()
+
+            key = self.evolution.key
+            if key in self.seen and self.same(self.seen[key]):
+                self.cycle = (self.seen[key], self.k - self.seen[key])
+                return self.get(k)
+
+            self.seen[key] = self.k
+
+        return self.evolution.frame_data()
+
+    def same(self, start):
+
+        other = self.checkpoints[(start // self.every) * self.every].copy()
+        for _ in range(start % self.every):
+            other.step()
+
+        return other.rows() == self.evolution.rows() and other.portal_grid() == self.evolution.portal_grid()
+
+    def get(self, k):
+
+        if self.last is not None and self.last[0] == k:
+            return self.last[1]
+
+        if k < 0:
+            k += self.lim
+        if not 0 <= k < self.lim:
+            raise IndexError('generation out of range')
+
+        t = k
+        if self.cycle is not None and t >= sum(self.cycle):
+            start, period = self.cycle
+            t = start + (t - start) % period
+
+        if t in self.cache:
+            self.cache.move_to_end(t)
+            frame = self.cache[t]
+        else:
+            frame = self.replay(t)
+            self.cache[t] = frame
+            if len(self.cache) > self.window:
+                self.cache.popitem(last=False)
+
+        self.last = (k, frame)
+
+        return frame
+
+class TimelineView:
+
+    def __init__(self, timeline, part):
+        self.timeline = timeline
+        self.part = part
+
+    def __len__(self):
+        return len(self.timeline)
+
+    def __getitem__(self, k):
+        return self.timeline.get(k)[self.part]
+
+def lazy_simulate(initial_grid, lim=None, backend='lists', window=64, every=32):
+
+    evolution = start_evolution(initial_grid, backend)
+    timeline = Timeline(evolution, lim or len(initial_grid) * len(initial_grid[0]), window, every)
+
+    return TimelineView(timeline, 0), TimelineView(timeline, 1)
+
+def numpy_portals(pre):
+
+    flat = pre.ravel()
+    portals = np.full(flat.size, -1, dtype=np.int32)
+
+    cells = np.flatnonzero((flat >= ord('a')) & (flat <= ord('z')))
+    if not cells.size:
+        return portals
+
+    # group portal cells by letter, keeping row-major order inside a group
+    order = np.argsort(flat[cells], kind='stable')
+    cells = cells[order]
+    letters = flat[cells]
+
+    starts = np.flatnonzero(np.r_[True, letters[1:] != letters[:-1]])
+    ends = np.r_[starts[1:], cells.size] - 1
+
+    # every later cell points at the first one, the first at the last one
+    first = np.repeat(cells[starts], ends - starts + 1)
+    later = first != cells
+    portals[cells[later]] = first[later]
+
+    paired = ends > starts
+    portals[cells[starts[paired]]] = cells[ends[paired]]
+
+    return portals
+
+def numpy_step(frame, portals, homes):
+
+    n, m = frame.shape
+
+    holes = frame == HOLE
+    padded = np.pad(holes, 1).astype(np.uint8)
+
+    counts = np.zeros((n, m), dtype=np.uint8)
+    for di, dj in MOORE:
+        counts += padded[1+di:n+1+di, 1+dj:m+1+dj]
+
+    survive = holes & ((counts == 2) | (counts == 3))
+    born = ~holes & (counts >= 3)
+    restored = np.where(homes != 0, homes, frame)
+
+    pre = np.where(holes, np.where(survive, HOLE, DOT), np.where(born, HOLE, restored)).astype(np.uint8)
+
+    next_portals = numpy_portals(pre)
+
+    frame = pre.copy()
+    frame.ravel()[next_portals != portals] = HOLE
+
+    return frame, next_portals
+
+def portal_tuples(portals, n, m):
+
+    portal_grid = [[(-1, -1) for _ in range(m)] for _ in range(n)]
+
+    for p in np.flatnonzero(portals >= 0).tolist():
+        q = int(portals[p])
+        portal_grid[p // m][p % m] = (q // m, q % m)
+
+    return portal_grid
+
+class NumpyEvolution:
+
+    def __init__(self, initial_grid):
+
+        self.n = len(initial_grid)
+        self.m = len(initial_grid[0])
+
+        self.frame = np.array([[ord(c) for c in row] for row in initial_grid], dtype=np.uint8)
+        self.homes = np.zeros_like(self.frame)
+        for (i, j), c in home_cells(initial_grid).items():
+            self.homes[i, j] = ord(c)
+        self.portals = numpy_portals(self.frame)
+        self.tuples = None
+
+        self.key = hash(self.frame.tobytes()) ^ hash(self.portals.tobytes())
+
+    def copy(self):
+        return copy.copy(self)
+
+    def rows(self):
+        return [list(row.tobytes().decode()) for row in self.frame]
+
+    def frame_data(self):
+        return (self.rows(), self.portal_grid())
+
+    def portal_grid(self):
+
+        if self.tuples is None:
+            self.tuples = portal_tuples(self.portals, self.n, self.m)
+
+        return self.tuples
+
+    def step(self):
+
+        frame, portals = numpy_step(self.frame, self.portals, self.homes)
+
+        if not np.array_equal(portals, self.portals):
+            self.tuples = None
+
+        self.frame = frame
+        self.portals = portals
+        self.key = hash(frame.tobytes()) ^ hash(portals.tobytes())
+
+def bit_cells(mask):
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def shift(mask, d):
+
+    # bit p of the result is bit p + d of mask
+    return mask >> d if d >= 0 else mask << -d
+
+class BitLayout:
+
+    def __init__(self, initial_grid):
+
+        self.n = len(initial_grid)
+        self.m = len(initial_grid[0])
+        self.initial_grid = initial_grid
+
+        # cell (i, j) is bit i * stride + j; the spare bit closing every row
+        # stays clear, so shifted rows never bleed into each other
+        self.stride = self.m + 1
+        self.full = 0
+        self.starts = 0
+        self.goal = 0
+        self.holes = 0
+        self.letters = {}
+
+        for i in range(self.n):
+            for j in range(self.m):
+
+                bit = 1 << (i * self.stride + j)
+                c = initial_grid[i][j]
+
+                self.full |= bit
+
+                if c == 'A':
+                    self.starts |= bit
+                if c == 'B':
+                    self.goal |= bit
+                if c == '&':
+                    self.holes |= bit
+                if c.islower():
+                    self.letters[c] = self.letters.get(c, 0) | bit
+
+        self.homes = 0
+        for i, j in home_cells(initial_grid):
+            self.homes |= 1 << (i * self.stride + j)
+
+        s = self.stride
+        self.moore = (-s - 1, -s, -s + 1, -1, 1, s - 1, s, s + 1)
+
+class BitFrame:
+
+    def __init__(self, layout, holes, intact, active):
+
+        # a cell shows '&' if its hole bit is set, else its original
+        # character if its intact bit is set, else '.'; active maps every
+        # portal letter to the cells where it is still uncovered
+        self.layout = layout
+        self.holes = holes
+        self.intact = intact
+        self.active = active
+        self.cache = {}
+
+    def pairing(self):
+
+        if 'pairing' not in self.cache:
+
+            partners = {}
+            sources = {}
+            paired = 0
+
+            for mask in self.active.values():
+                for a, b in pair_portals(list(bit_cells(mask))).items():
+                    partners[a] = b
+                    sources.setdefault(b, []).append(a)
+                    paired |= 1 << a
+
+            self.cache['pairing'] = (partners, sources, paired)
+
+        return self.cache['pairing']
+
+    def rows(self):
+
+        if 'rows' not in self.cache:
+
+            layout = self.layout
+            width = layout.n * layout.stride + 1
+            holes = format(self.holes, f'0{width}b')[::-1]
+            intact = format(self.intact, f'0{width}b')[::-1]
+
+            rows = []
+            for i in range(layout.n):
+                row = []
+                for j in range(layout.m):
+                    p = i * layout.stride + j
+                    if holes[p] == '1':
+                        row.append('&')
+                    elif intact[p] == '1':
+                        row.append(layout.initial_grid[i][j])
                     else:
-                        grid[k][i][j] = grid[k-1][i][j]
+                        row.append('.')
+                rows.append(row)
 
-        portal_grid.append(generate_portal_grid(grid[k]))
+            self.cache['rows'] = rows
 
-        for i in range(n):
-            for j in range(m):
-                if portal_grid[k-1][i][j] != portal_grid[k][i][j]:
-                    grid[k][i][j] = '&'
+        return self.cache['rows']
 
-    return grid, portal_grid
+    def portal_grid(self):
 
-best_paths = []
-best_len = 1000000000
-best_pcount = 0
+        if 'portals' not in self.cache:
 
-def dfs(grid, portal_grid, visited, i, j, k, current_path, current_portal_count): 
+            s = self.layout.stride
+            portal_grid = [[(-1, -1) for _ in range(self.layout.m)] for _ in range(self.layout.n)]
 
-    global best_paths, best_len, best_pcount
+            for a, b in self.pairing()[0].items():
+                portal_grid[a // s][a % s] = (b // s, b % s)
 
-    if visited[i][j]:
-        return
-    
-    if grid[k][i][j] == '&':
-        return
-    
-    if len(current_path) > best_len:
-        return
+            self.cache['portals'] = portal_grid
 
-    if grid[k][i][j] == 'B': 
+        return self.cache['portals']
 
-        if len(current_path) < best_len or (len(current_path) == best_len and current_portal_count > best_pcount):
-            best_paths.clear()
-            best_len = len(current_path)
-            best_pcount = current_portal_count
-            best_paths.append(current_path)
-        elif len(current_path) == best_len and current_portal_count == best_pcount:
-            best_paths.append(current_path)
+    def __getitem__(self, part):
+        return self.rows() if part == 0 else self.portal_grid()
 
-        return
-    
-    visited[i][j] = True
+class BitEvolution:
+
+    def __init__(self, initial_grid):
+
+        layout = BitLayout(initial_grid)
+        active = {p: mask for p, mask in layout.letters.items()}
+
+        self.layout = layout
+        self.current = BitFrame(layout, layout.holes, layout.full & ~layout.holes, active)
+        self.key = hash((self.current.holes, self.current.intact, tuple(active.values())))
+
+    def copy(self):
+        return copy.copy(self)
+
+    def rows(self):
+        return self.current.rows()
+
+    def portal_grid(self):
+        return self.current.portal_grid()
+
+    def frame_data(self):
+        return self.current
+
+    def step(self):
+
+        layout = self.layout
+        frame = self.current
+        holes = frame.holes
+
+        # bit-sliced adder: planes[b] holds bit b of every cell's hole count
+        planes = []
+        for d in layout.moore:
+            x = shift(holes, d)
+            for b in range(len(planes)):
+                carry = planes[b] & x
+                planes[b] ^= x
+                x = carry
+            if x:
+                planes.append(x)
+
+        b0, b1, b2, b3 = planes + [0] * (4 - len(planes))
+
+        survive = holes & b1 & ~b2 & ~b3
+        born = ((b0 & b1) | b2 | b3) & ~holes & layout.full
+
+        pre_holes = survive | born
+        intact = (frame.intact | layout.homes) & ~holes & ~born & layout.full
+
+        active = {}
+        overridden = 0
+
+        for p, mask in layout.letters.items():
+
+            active[p] = mask & intact
+
+            if active[p] != frame.active[p]:
+                before = pair_portals(list(bit_cells(frame.active[p])))
+                after = pair_portals(list(bit_cells(active[p])))
+                for cell in before.keys() | after.keys():
+                    if before.get(cell) != after.get(cell):
+                        overridden |= 1 << cell
+
+        self.current = BitFrame(layout, pre_holes | overridden, intact, active)
+        self.key = hash((self.current.holes, intact & ~self.current.holes, tuple(active.values())))
+
+def bit_bfs_best_paths(timeline):
+
+    layout = timeline.get(0).layout
+    s = layout.stride
+    deltas = [di * s + dj for di, dj, _ in STEPS]
+
+    # fronts[k] has a bit for every cell reachable at time k that is not B
+    fronts = [layout.starts]
+
+    def predecessors(t, cell):
+
+        frame = timeline.get(t)
+        front = fronts[t]
+        partners, sources, paired = frame.pairing()
+
+        c = cell[0] * s + cell[1]
+        steps = []
+
+        for d in range(4):
+
+            if not (frame.holes >> c) & 1 and not (paired >> c) & 1:
+                p = c - deltas[d]
+                if p >= 0 and (front >> p) & 1:
+                    steps.append((p // s, p % s, d, None))
+
+            for e in sources.get(c, []):
+                p = e - deltas[d]
+                if not (frame.holes >> e) & 1 and p >= 0 and (front >> p) & 1:
+                    steps.append((p // s, p % s, d, (e // s, e % s)))
+
+        return steps
+
+    for k in range(len(timeline) - 1):
+
+        frame = timeline.get(k)
+        following = timeline.get(k + 1)
+        partners, _, paired = frame.pairing()
+
+        open_cells = layout.full & ~frame.holes
+        reached = 0
+
+        for d in deltas:
+            moved = shift(fronts[k], -d) & open_cells
+            reached |= moved & ~paired
+            for e in bit_cells(moved & paired):
+                reached |= 1 << partners[e]
+
+        reached &= ~following.holes
+        goal = reached & layout.goal & following.intact
+        fronts.append(reached & ~goal)
+
+        if goal:
+
+            terminals = [(c // s, c % s) for c in bit_cells(goal)]
+            found = simple_walks(lambda t, cell: predecessors(t - 1, cell), terminals, k + 1)
+
+            if found:
+                pcount = max(c for _, c in found)
+                return [p for p, c in found if c == pcount], pcount
+
+        if not fronts[-1]:
+            break
+
+    return [], 0
+
+STEPS = ((-1, 0, 'N'), (1, 0, 'S'), (0, -1, 'W'), (0, 1, 'E'))
+
+def simple_walks(predecessors, terminals, length):
+
+    found = []
 
-    di = [-1, 1, 0, 0]
-    dj = [0, 0, -1, 1]
-    move = ['N', 'S', 'W', 'E']
+    for terminal in terminals:
 
-    for d in range(4):
-        if valid(i + di[d], j + dj[d], grid[k]) and not visited[i + di[d]][j + dj[d]] and grid[k][i + di[d]][j + dj[d]] != '&':
-            if portal_grid[k][i + di[d]][j + dj[d]] != (-1, -1):
-                visited[i + di[d]][j + dj[d]] = True
-                pi, pj = portal_grid[k][i + di[d]][j + dj[d]]
-                dfs(grid, portal_grid, visited, pi, pj, k + 1, current_path + move[d], current_portal_count + 1)
-                visited[i + di[d]][j + dj[d]] = False
-            else: 
-                dfs(grid, portal_grid, visited, i + di[d], j + dj[d], k + 1, current_path + move[d], current_portal_count)
+        # walk the predecessor lists backwards from B, skipping any step that
+        # would touch a cell (or portal entrance) already on the path
+        used = {terminal}
+        steps = []
+        stack = [(length, iter(predecessors(length, terminal)))]
 
-    visited[i][j] = False
+        while stack:
 
-def generate_best_paths(grid, portal_grid):
+            k, options = stack[-1]
+
+            if k > 0:
+                for pi, pj, d, via in options:
+                    if (pi, pj) not in used and (via is None or via not in used):
+                        used.add((pi, pj))
+                        if via is not None:
+                            used.add(via)
+                        steps.append(((pi, pj), d, via))
+                        stack.append((k - 1, iter(predecessors(k - 1, (pi, pj)))))
+                        break
+                else:
+                    options = None
+                if options is not None:
+                    continue
+            else:
+                path = ''.join(STEPS[d][2] for _, d, _ in reversed(steps))
+                found.append((path, sum(via is not None for _, _, via in steps)))
+
+            stack.pop()
+            if steps:
+                cell, _, via = steps.pop()
+                used.discard(cell)
+                if via is not None:
+                    used.discard(via)
+
+    return found
+
+def bfs_best_paths(grid, portal_grid):
 
     n = len(grid[0])
     m = len(grid[0][0])
 
-    visited = [[False for _ in range(m)] for _ in range(n)]
+    # layers[k] maps every cell reachable at time k to the (cell, move,
+    # portal entrance) steps that reach it from layer k - 1
+    layers = [{(i, j): [] for i in range(n) for j in range(m) if grid[0][i][j] == 'A'}]
 
-    for i in range(n):
+    for k in range(len(grid) - 1):
+
+        frame = grid[k]
+        portals = portal_grid[k]
+        following = grid[k+1]
+
+        layer = {}
+
+        for i, j in layers[k]:
+            for d in range(4):
+
+                ni, nj = i + STEPS[d][0], j + STEPS[d][1]
+
+                if not (0 <= ni < n and 0 <= nj < m) or frame[ni][nj] == '&':
+                    continue
+
+                via = None
+                if portals[ni][nj] != (-1, -1):
+                    via = (ni, nj)
+                    ni, nj = portals[ni][nj]
+
+                if following[ni][nj] == '&':
+                    continue
+
+                layer.setdefault((ni, nj), []).append((i, j, d, via))
+
+        layers.append(layer)
+
+        terminals = [(i, j) for i, j in layer if following[i][j] == 'B']
+
+        if terminals:
+
+            found = simple_walks(lambda t, cell: layers[t][cell], terminals, k + 1)
+
+            if found:
+                pcount = max(c for _, c in found)
+                return [p for p, c in found if c == pcount], pcount
+
+            for cell in terminals:
+                del layer[cell]
+
+        if not layer:
+            break
+
+    return [], 0
+
+class PortalMazeSolver:
+
+    def __init__(self, initial_state, backend='lists', window=64, every=32):
+
+        self.backend = backend
+        self.grid, self.portal_grid = lazy_simulate(initial_state, backend=backend, window=window, every=every)
+
+        self.best_paths = []
+        self.best_len = 1000000000
+        self.best_pcount = 0
+
+    def dfs(self, visited, i, j, k, current_path, current_portal_count):
+
+        grid = self.grid
+        portal_grid = self.portal_grid
+
+        if visited[i][j]:
+            return
+
+        if grid[k][i][j] == '&':
+            return
+
+        if len(current_path) > self.best_len:
+            return
+
+        if grid[k][i][j] == 'B':
+
+            if len(current_path) < self.best_len or (len(current_path) == self.best_len and current_portal_count > self.best_pcount):
+                self.best_paths.clear()
+                self.best_len = len(current_path)
+                self.best_pcount = current_portal_count
+                self.best_paths.append(current_path)
+            elif len(current_path) == self.best_len and current_portal_count == self.best_pcount:
+                self.best_paths.append(current_path)
+
+            return
+
+        visited[i][j] = True
+
+        for di, dj, move in STEPS:
+            if valid(i + di, j + dj, grid[k]) and not visited[i + di][j + dj] and grid[k][i + di][j + dj] != '&':
+                if portal_grid[k][i + di][j + dj] != (-1, -1):
+                    visited[i + di][j + dj] = True
+                    pi, pj = portal_grid[k][i + di][j + dj]
+                    self.dfs(visited, pi, pj, k + 1, current_path + move, current_portal_count + 1)
+                    visited[i + di][j + dj] = False
+                else:
+                    self.dfs(visited, i + di, j + dj, k + 1, current_path + move, current_portal_count)
+
+        visited[i][j] = False
+
+    def generate_best_paths(self):
+
+        n = len(self.grid[0])
+        m = len(self.grid[0][0])
+
+        visited = [[False for _ in range(m)] for _ in range(n)]
+
+        for i in range(n):
             for j in range(m):
-                if grid[0][i][j] == 'A':
-                    dfs(grid, portal_grid, visited, i, j, 0, "", 0)    
+                if self.grid[0][i][j] == 'A':
+                    self.dfs(visited, i, j, 0, "", 0)
 
-def solve(initial_state):
+    def solve(self, exhaustive=False):
 
-    global best_paths, best_len, best_pcount
+        self.best_paths = []
+        self.best_len = 1000000000
+        self.best_pcount = 0
 
-    grid, portal_grid = simulate(initial_state)
+        if exhaustive:
+            self.generate_best_paths()
+        elif self.backend == 'bits':
+            self.best_paths, self.best_pcount = bit_bfs_best_paths(self.grid.timeline)
+        else:
+            self.best_paths, self.best_pcount = bfs_best_paths(self.grid, self.portal_grid)
 
-    generate_best_paths(grid, portal_grid)
+        self.best_paths.sort()
 
-    best_paths.sort()
-    
-    flag = f'{len(best_paths)}-'
-    for p in best_paths:
-        flag += p
-    flag += f'-{best_pcount}'
-    
-    return flag    
+        flag = f'{len(self.best_paths)}-'
+        for p in self.best_paths:
+            flag += p
+        flag += f'-{self.best_pcount}'
+
+        return flag
+
+def solve(initial_state, backend='lists', window=64, every=32, exhaustive=False):
+    return PortalMazeSolver(initial_state, backend, window, every).solve(exhaustive)
+
+def find_puzzles(pattern):
+
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+
+    for path in sorted(glob.iglob(pattern)):
+        if os.path.isfile(path):
+            yield path
+
+def solve_file(path, backend='lists', window=64, every=32, exhaustive=False):
+
+    start = time.perf_counter()
+    flag = PortalMazeSolver(parse(path), backend, window, every).solve(exhaustive)
+
+    return {'path': path, 'password': flag, 'time': round(time.perf_counter() - start, 6)}
+
+def batch(pattern, workers, out, backend='lists', window=64, every=32, exhaustive=False):
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(partial(solve_file, backend=backend, window=window, every=every, exhaustive=exhaustive), find_puzzles(pattern)):
+            out.write(json.dumps(result) + '\n')
+
+def random_board(size, seed=0):
+
+    random.seed(seed)
+
+    grid = [['&' if random.random() < 0.3 else '.' for _ in range(size)] for _ in range(size)]
+
+    cells = random.sample(range(size * size), 2 + 2 * 10)
+    for c, p in zip(cells, 'AB' + 'abcdefghij' * 2):
+        grid[c // size][c % size] = p
+
+    return grid
+
+def benchmark(size, generations):
+
+    board = random_board(size)
+
+    print(f'{size}x{size} board, {generations} generations')
+
+    results = []
+    for backend in ['lists', 'numpy', 'bits']:
+        start = time.perf_counter()
+        results.append(simulate([row[:] for row in board], generations, backend))
+        print(f'{backend}: {time.perf_counter() - start:.3f}s')
+
+    print('identical' if results[0] == results[1] == results[2] else 'MISMATCH')
 
 def main():
 
     parser = argparse.ArgumentParser(description='First challenge')
-    parser.add_argument('path', help='Path to input file')
+    parser.add_argument('path', nargs='?', default=None, help='Path to input file')
+    parser.add_argument('--numpy', action='store_true', help='Step the black holes with NumPy array operations')
+    parser.add_argument('--bitboard', action='store_true', help='Keep frames as big-int bitboards and search them bitwise')
+    parser.add_argument('--dfs', action='store_true', help='Search every simple path instead of breadth-first')
+    parser.add_argument('--window', type=int, default=64, help='Generations kept in memory')
+    parser.add_argument('--checkpoint-every', type=int, default=32, help='Generations between simulation checkpoints')
+    parser.add_argument('--benchmark', type=int, metavar='SIZE', help='Time both simulations on a random SIZExSIZE board')
+    parser.add_argument('--batch', metavar='PATTERN', help='Solve every board in a directory or glob, one JSON line each')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --batch')
+    parser.add_argument('--output', default=None, help='Write --batch results to this file instead of stdout')
     args = parser.parse_args()
     path = args.path
 
+    backend = 'lists'
+    if args.numpy:
+        backend = 'numpy'
+    elif args.bitboard:
+        backend = 'bits'
+
+    if args.benchmark:
+        benchmark(args.benchmark, 100)
+        return
+
+    if args.batch:
+        if args.output:
+            with open(args.output, 'w') as out:
+                batch(args.batch, args.workers, out, backend, args.window, args.checkpoint_every, args.dfs)
+        else:
+            batch(args.batch, args.workers, sys.stdout, backend, args.window, args.checkpoint_every, args.dfs)
+        return
+
+    if not path:
+        parser.error('path is required')
+
     grid = parse(path)
 
     print('\nInitial state:')
     for row in grid:
         print(row)
 
-    flag = solve(grid)
+    flag = PortalMazeSolver(grid, backend, args.window, args.checkpoint_every).solve(args.dfs)
     print('\npassword:')
     print(flag)
 
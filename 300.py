@@ -1,22 +1,64 @@
 import argparse
-import stepic
 from PIL import Image
 import numpy as np
 import cv2
 import pytesseract
 import os
+import hashlib
+import random
+import time
+import json
+from concurrent.futures import ThreadPoolExecutor
 
-def split_image(img, block_size):
-    n, m = img.size
-    blocks_n = n // block_size
-    blocks = [[None for _ in range(blocks_n)] for _ in range(blocks_n)]
-    for i in range(0, n, block_size):
-        for j in range(0, m, block_size):
-            if i+block_size > n or j+block_size > m:
-                continue
-            block = img.crop((j, i, j+block_size, i+block_size))
-            blocks[i//block_size][j//block_size] = block
-    return blocks
+try:
+    import pyzipper
+except ImportError:
+    pyzipper = None
+
+def split_image(pixels, block_size):
+
+    # blocks[i][j] is a read-only view of pixels[i*block_size:(i+1)*block_size, j*block_size:(j+1)*block_size];
+    # partial blocks at the right and bottom edges are left out
+    windows = np.lib.stride_tricks.sliding_window_view(pixels, (block_size, block_size), axis=(0, 1))
+
+    return np.moveaxis(windows[::block_size, ::block_size], (-2, -1), (2, 3))
+
+def lsb_decode(pixels):
+
+    # stepic's layout: three pixels per character, the red, green and blue
+    # LSBs of the first eight channels hold the byte and the ninth is set on
+    # the last character
+    if pixels.ndim != 3 or pixels.shape[2] < 3:
+        raise ValueError('Unsupported pixel format: image must be RGB, RGBA, or CMYK')
+
+    message = ''
+    bits = np.empty(0, dtype=np.uint8)
+
+    # messages are short, so read a few rows at a time rather than the whole image
+    row = 0
+    rows = 1
+
+    while row < pixels.shape[0]:
+
+        chunk = pixels[row:row + rows, :, :3]
+        row += rows
+        rows *= 2
+
+        bits = np.concatenate([bits, (chunk & 1).reshape(-1).astype(np.uint8)])
+
+        groups = bits[:len(bits) // 9 * 9].reshape(-1, 9)
+        bits = bits[len(groups) * 9:]
+
+        ends = np.flatnonzero(groups[:, 8])
+        if ends.size:
+            groups = groups[:ends[0] + 1]
+
+        message += np.packbits(groups[:, :8], axis=1).tobytes().decode('latin-1')
+
+        if ends.size:
+            return message
+
+    raise ValueError('no message found in image')
 
 def preprocess(img):
     img = np.array(img)
@@ -27,34 +69,138 @@ def preprocess(img):
     img = Image.fromarray(img)
     return img
 
-def get_sudoku_grid(img):
+OCR_CONFIG = '--psm 13 --oem 3 -c tessedit_char_whitelist=0123456789'
+
+# fraction of inked pixels below which a preprocessed cell counts as blank
+MIN_INK = 0.01
+
+ocr_cache = {}
+
+def clean_cell(block):
+
+    block = Image.fromarray(np.ascontiguousarray(block[10:-10, 10:-10]))
+    block = preprocess(block)
+
+    ink = np.asarray(block)
+    if ink.ndim == 3:
+        ink = ink.any(axis=-1)
+
+    if np.count_nonzero(ink) < MIN_INK * block.size[0] * block.size[1]:
+        return None
+
+    return block
+
+def ocr_cell(block):
+
+    block = block.resize((block.size[0]*3, block.size[1]*3), Image.BILINEAR)
+
+    # identical cells (the same digit in the same font) are only OCR'd once
+    key = (block.mode, block.size, hashlib.sha1(block.tobytes()).hexdigest())
+    if key in ocr_cache:
+        return ocr_cache[key]
+
+    digit = pytesseract.image_to_string(block, config=OCR_CONFIG).strip()
+
+    if digit:
+        digit = int(digit)
+        if digit > 16:
+            digit //= 10
+    else:
+        digit = 0
+
+    ocr_cache[key] = digit
+
+    return digit
+
+TEMPLATE_SIZE = 24
+
+def cell_features(block):
+
+    features = cv2.resize(np.asarray(block), (TEMPLATE_SIZE, TEMPLATE_SIZE), interpolation=cv2.INTER_AREA)
+    features = features.astype(np.float32).ravel()
+
+    # zero mean and unit length, so a dot product is the normalized cross-correlation
+    features -= features.mean()
+    norm = np.linalg.norm(features)
+
+    return features / norm if norm else features
+
+class DigitTemplates:
+
+    def __init__(self, sums=None, counts=None):
+
+        # sums[d] accumulates the features of every cell labelled d
+        self.sums = np.zeros((17, TEMPLATE_SIZE * TEMPLATE_SIZE), dtype=np.float32) if sums is None else sums
+        self.counts = np.zeros(17, dtype=np.int64) if counts is None else counts
+
+    @classmethod
+    def load(cls, path):
+
+        with np.load(path) as data:
+            return cls(data['sums'], data['counts'])
+
+    def save(self, path):
+
+        with open(path, 'wb') as f:
+            np.savez(f, sums=self.sums, counts=self.counts)
+
+    def learn(self, img, sudoku_grid):
+
+        block_size = img.size[0] // 16
+        blocks = split_image(np.asarray(img), block_size)
+
+        for i in range(16):
+            for j in range(16):
+                block = clean_cell(blocks[i][j]) if sudoku_grid[i][j] else None
+                if block is not None:
+                    self.sums[sudoku_grid[i][j]] += cell_features(block)
+                    self.counts[sudoku_grid[i][j]] += 1
+
+    def match(self, features):
+
+        digits = np.flatnonzero(self.counts)
+        if not digits.size:
+            return np.zeros(len(features), dtype=np.int64), np.zeros(len(features))
+
+        templates = self.sums[digits]
+        templates /= np.linalg.norm(templates, axis=1, keepdims=True)
+
+        scores = features @ templates.T
+        best = scores.argmax(axis=1)
+
+        return digits[best], scores[np.arange(len(features)), best]
+
+def get_sudoku_grid(img, workers=None, templates=None, min_score=0.97):
 
     n, m = img.size
     block_size = n // 16
 
-    blocks = split_image(img, block_size)
+    blocks = split_image(np.asarray(img), block_size)
 
-    sudoku_grid = [[0 for _ in range(16)] for _ in range(16)]
+    cells = [clean_cell(blocks[i][j]) for i in range(16) for j in range(16)]
+    digits = [0] * 256
 
-    for i in range(16):
-        for j in range(16):
+    todo = [c for c in range(256) if cells[c] is not None]
+
+    # template matches only fall back to Tesseract when they are unsure
+    if templates is not None and todo:
+        found, scores = templates.match(np.stack([cell_features(cells[c]) for c in todo]))
+        for c, digit, score in zip(todo, found, scores):
+            if score >= min_score:
+                digits[c] = int(digit)
+        todo = [c for c, score in zip(todo, scores) if score < min_score]
+
+    # every Tesseract call is a subprocess, so threads are enough to overlap them
+    if todo:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            for c, digit in zip(todo, executor.map(ocr_cell, [cells[c] for c in todo])):
+                digits[c] = digit
+
+    sudoku_grid = [digits[i*16:(i+1)*16] for i in range(16)]
 
-            block = Image.fromarray(np.array(blocks[i][j])[10:-10, 10:-10])
-            block = preprocess(block)
-            block = block.resize((block.size[0]*3, block.size[1]*3), Image.BILINEAR)
-            digit = pytesseract.image_to_string(block, config='--psm 13 --oem 3 -c tessedit_char_whitelist=0123456789')
-            sudoku_grid[i][j] = digit.strip()
-
-            if sudoku_grid[i][j]:
-                sudoku_grid[i][j] = int(sudoku_grid[i][j])
-                if sudoku_grid[i][j] > 16:
-                    sudoku_grid[i][j] //= 10
-            else:
-                sudoku_grid[i][j] = 0
-            
     return sudoku_grid
 
-def solve_sudoku(sudoku_grid):
+def backtrack_sudoku(sudoku_grid):
 
     def is_valid(sudoku_grid, i, j, num):
         for x in range(16):
@@ -83,89 +229,506 @@ def solve_sudoku(sudoku_grid):
 
     return sudoku_grid
 
-def get_flag(img_path):
+FULL = (1 << 16) - 1
 
-    scrambled_img = Image.open(img_path)
+# cell c sits in row UNIT_OF[c][0], column UNIT_OF[c][1] and box UNIT_OF[c][2];
+# units 0-15 are rows, 16-31 columns and 32-47 boxes
+UNIT_OF = [(c // 16, 16 + c % 16, 32 + (c // 64) * 4 + (c % 16) // 4) for c in range(256)]
+UNITS = [[c for c in range(256) if u in UNIT_OF[c]] for u in range(48)]
 
-    decoded_img = stepic.decode(scrambled_img)
-    # print(decoded_img)
+class SudokuState:
 
-    seed = int(decoded_img.replace('#', ''))
+    def __init__(self, cells, used):
+
+        # used[u] has bit d - 1 set when digit d is placed in unit u
+        self.cells = cells
+        self.used = used
+
+    def copy(self):
+        return SudokuState(self.cells[:], self.used[:])
+
+    def candidates(self, c):
+        r, k, b = UNIT_OF[c]
+        return FULL & ~(self.used[r] | self.used[k] | self.used[b])
+
+    def place(self, c, bit):
+
+        if not self.candidates(c) & bit:
+            return False
+
+        self.cells[c] = bit.bit_length()
+        for u in UNIT_OF[c]:
+            self.used[u] |= bit
+
+        return True
+
+    def propagate(self):
+
+        changed = True
+
+        while changed:
+
+            changed = False
+
+            # naked singles: an empty cell with one candidate left
+            for c in range(256):
+                if self.cells[c]:
+                    continue
+                cand = self.candidates(c)
+                if not cand:
+                    return False
+                if not cand & (cand - 1):
+                    self.place(c, cand)
+                    changed = True
+
+            # hidden singles: a digit with one possible cell in a unit
+            for u in range(48):
+
+                once = twice = 0
+                for c in UNITS[u]:
+                    if not self.cells[c]:
+                        cand = self.candidates(c)
+                        twice |= once & cand
+                        once |= cand
+
+                if FULL & ~self.used[u] & ~once:
+                    return False
+
+                hidden = once & ~twice & ~self.used[u]
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    c = next((c for c in UNITS[u] if not self.cells[c] and self.candidates(c) & bit), None)
+                    if c is None or not self.place(c, bit):
+                        return False
+                    changed = True
+
+        return True
+
+    def search(self):
+
+        if not self.propagate():
+            return None
+
+        best = None
+        best_count = 17
+
+        for c in range(256):
+            if not self.cells[c]:
+                count = bin(self.candidates(c)).count('1')
+                if count < best_count:
+                    best, best_count = c, count
+
+        if best is None:
+            return self
+
+        cand = self.candidates(best)
+        while cand:
+            bit = cand & -cand
+            cand ^= bit
+            state = self.copy()
+            state.place(best, bit)
+            solved = state.search()
+            if solved is not None:
+                return solved
+
+        return None
+
+def solve_sudoku(sudoku_grid):
+
+    cells = [num for row in sudoku_grid for num in row]
+    state = SudokuState([0] * 256, [0] * 48)
+
+    for c in range(256):
+        if cells[c] and not state.place(c, 1 << (cells[c] - 1)):
+            return sudoku_grid
+
+    solved = state.search()
+
+    if solved is not None:
+        for c in range(256):
+            sudoku_grid[c // 16][c % 16] = solved.cells[c]
+
+    return sudoku_grid
+
+def dlx_sudoku(sudoku_grid):
+
+    # exact cover: every (cell, digit) choice covers one cell, row-digit,
+    # column-digit and box-digit constraint
+    choices = {}
+    for c in range(256):
+        for num in range(1, 17):
+            r, k, b = UNIT_OF[c]
+            choices[(c, num)] = [('cell', c), ('row', r, num), ('col', k, num), ('box', b, num)]
+
+    columns = {}
+    for choice, constraints in choices.items():
+        for constraint in constraints:
+            columns.setdefault(constraint, set()).add(choice)
+
+    def select(choice):
+        removed = []
+        for constraint in choices[choice]:
+            for other in columns[constraint]:
+                for k in choices[other]:
+                    if k != constraint:
+                        columns[k].remove(other)
+            removed.append(columns.pop(constraint))
+        return removed
+
+    def deselect(choice, removed):
+        for constraint in reversed(choices[choice]):
+            columns[constraint] = removed.pop()
+            for other in columns[constraint]:
+                for k in choices[other]:
+                    if k != constraint:
+                        columns[k].add(other)
+
+    def search(solution):
+
+        if not columns:
+            return True
+
+        constraint = min(columns, key=lambda k: len(columns[k]))
+
+        for choice in sorted(columns[constraint]):
+            removed = select(choice)
+            solution.append(choice)
+            if search(solution):
+                return True
+            solution.pop()
+            deselect(choice, removed)
+
+        return False
+
+    solution = []
+    for i in range(16):
+        for j in range(16):
+            num = sudoku_grid[i][j]
+            if num:
+                choice = (i * 16 + j, num)
+                if any(k not in columns for k in choices[choice]):
+                    return sudoku_grid
+                select(choice)
+                solution.append(choice)
+
+    if search(solution):
+        for c, num in solution:
+            sudoku_grid[c // 16][c % 16] = num
+
+    return sudoku_grid
+
+SOLVERS = {
+    'masks': solve_sudoku,
+    'dlx': dlx_sudoku,
+    'backtrack': backtrack_sudoku
+}
+
+def hard_grids(count, givens=90, seed=0):
+
+    rng = random.Random(seed)
+    grids = []
+
+    for _ in range(count):
+
+        # shuffle digits, rows inside bands, bands, columns inside stacks and
+        # stacks of a valid base pattern, then blank all but `givens` cells
+        digits = list(range(1, 17))
+        rng.shuffle(digits)
+
+        rows = [band * 4 + r for band in rng.sample(range(4), 4) for r in rng.sample(range(4), 4)]
+        cols = [stack * 4 + k for stack in rng.sample(range(4), 4) for k in rng.sample(range(4), 4)]
+
+        grid = [[digits[(4 * (i % 4) + i // 4 + j) % 16] for j in cols] for i in rows]
+
+        for c in rng.sample(range(256), 256 - givens):
+            grid[c // 16][c % 16] = 0
+
+        grids.append(grid)
+
+    return grids
+
+def check_solution(puzzle, solution):
+
+    for i in range(16):
+        for j in range(16):
+            if puzzle[i][j] and puzzle[i][j] != solution[i][j]:
+                return False
+
+    cells = [num for row in solution for num in row]
+    return all(sorted(cells[c] for c in unit) == list(range(1, 17)) for unit in UNITS)
+
+def benchmark(count, solvers, givens=90):
+
+    grids = hard_grids(count, givens)
+
+    print(f'{count} 16x16 grids, {givens} givens each')
+
+    for name in solvers:
+
+        start = time.perf_counter()
+        solved = [SOLVERS[name]([row[:] for row in grid]) for grid in grids]
+        elapsed = time.perf_counter() - start
+
+        ok = sum(check_solution(grid, sol) for grid, sol in zip(grids, solved))
+        print(f'{name}: {elapsed:.3f}s ({ok}/{count} solved)')
+
+def unscramble(scrambled_img, seed, scrambled_pix=None):
 
     np.random.seed(seed)
 
-    scrambled_pix = scrambled_img.getdata()
+    if scrambled_pix is None:
+        scrambled_pix = np.asarray(scrambled_img)
+    pixels = scrambled_pix.reshape(scrambled_pix.shape[0] * scrambled_pix.shape[1], -1)
+
+    indices = np.random.permutation(len(pixels))
+
+    # pixel i of the scrambled image belongs at position indices[i]
+    unscrambled_pix = np.empty_like(pixels)
+    unscrambled_pix[indices] = pixels
+
+    img = Image.fromarray(unscrambled_pix.reshape(scrambled_pix.shape))
+    if scrambled_img.mode == 'P':
+        img.putpalette(scrambled_img.getpalette())
+
+    return img
+
+def restore_image(img_path):
 
-    indices = np.random.permutation(len(scrambled_pix))
+    scrambled_img = Image.open(img_path)
+    scrambled_pix = np.asarray(scrambled_img)
+
+    decoded_img = lsb_decode(scrambled_pix)
+    # print(decoded_img)
 
-    unscrambled_pix = [0] * len(scrambled_pix)
-    for i, pos in enumerate(indices):
-        unscrambled_pix[pos] = scrambled_pix[i]
+    seed = int(decoded_img.replace('#', ''))
 
-    img = Image.new(scrambled_img.mode, scrambled_img.size) 
-    img.putdata(unscrambled_pix)
+    img = unscramble(scrambled_img, seed, scrambled_pix)
     #img.show()
 
-    n, m = img.size
-    # print(f'{n}x{m}')
+    pixels = np.array(img)
+
+    n = pixels.shape[1]
+    # print(f'{n}x{n}')
 
     block_size = n // 4
     # print(f'block size: {block_size}')
 
-    blocks = split_image(img, block_size)
+    blocks = split_image(pixels, block_size)
+
+    # placed[p] is the index in sources of the block that ends up at position p
+    sources = []
+    placed = [None] * 16
 
     for i in range(4):
         for j in range(4):
 
-            decoded_block = stepic.decode(blocks[i][j])
+            decoded_block = lsb_decode(blocks[i][j])
             message = int(decoded_block.replace('#', ''), 2)
 
-            rotation = (message >> 4) * -90
+            rotation = message >> 4
             position = message & 0b001111
 
-            fi = position // 4
-            fj = position % 4
+            # print(f'Block ({i}, {j}): rotation={rotation * -90}, position={position}')
+
+            sources.append(np.rot90(blocks[i][j], -rotation))
+            placed[position] = len(sources) - 1
 
-            # print(f'Block ({i}, {j}): rotation={rotation}, position={position} ({fi}, {fj})')
+    for p in range(16):
+        if placed[p] is None:
+            sources.append(blocks[p // 4][p % 4])
+            placed[p] = len(sources) - 1
 
-            blocks[i][j] = blocks[i][j].rotate(rotation)
+    k = 4 * block_size
+    gathered = np.stack(sources)[placed].reshape((4, 4) + sources[0].shape)
+    pixels[:k, :k] = gathered.swapaxes(1, 2).reshape((k, k) + sources[0].shape[2:])
 
-            img.paste(blocks[i][j], (fj*block_size, fi*block_size))
+    img = Image.fromarray(pixels)
 
     # img.show()
 
-    get_sudoku_grid(img)
+    return img
+
+def get_flag(img_path, solver=solve_sudoku, workers=None, templates=None, learn=False, timings=None):
+
+    start = time.perf_counter()
+
+    img = restore_image(img_path)
+    restored = time.perf_counter()
 
-    sudoku_grid = get_sudoku_grid(img)
+    sudoku_grid = get_sudoku_grid(img, workers, templates)
+    givens = [row[:] for row in sudoku_grid]
+    read = time.perf_counter()
+
+    solved = solver(sudoku_grid)
+
+    if timings is not None:
+        timings['restore'] = restored - start
+        timings['ocr'] = read - restored
+        timings['solve'] = time.perf_counter() - read
+
+    # the givens of a grid that solves cleanly are trusted as labels
+    if learn and check_solution(givens, solved):
+        templates.learn(img, givens)
 
     flag = ''
-    for row in solve_sudoku(sudoku_grid):
+    for row in solved:
         for c in row:
             flag += str(c)
     
     return flag
 
+def open_archive(zip_path, password):
+
+    # 7z writes AES-encrypted zips, which zipfile cannot decrypt
+    if pyzipper is None:
+        raise ImportError('pyzipper is required to extract the level archives')
+
+    archive = pyzipper.AESZipFile(zip_path)
+    archive.setpassword(password.encode())
+
+    return archive
+
+def extract_level(zip_path, password, extractor):
+
+    with open_archive(zip_path, password) as archive:
+        names = archive.namelist()
+
+    images = [name for name in names if name.endswith('.png')]
+    rest = [name for name in names if not name.endswith('.png')]
+
+    def extract(members):
+        with open_archive(zip_path, password) as archive:
+            for name in members:
+                archive.extract(name)
+
+    # the level image is needed now; the next archive only once it is solved
+    extract(images)
+
+    return extractor.submit(extract, rest)
+
+def load_checkpoint(path):
+
+    if not path or not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, level, flag):
+
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'level': level, 'password': flag}, f)
+
+    os.replace(path + '.tmp', path)
+
+def run_levels(first, last, solver, workers, templates, learn, checkpoint, templates_path=None):
+
+    level = first
+    password = None
+
+    done = load_checkpoint(checkpoint)
+    if done is not None:
+        level = done['level'] + 1
+        password = done['password']
+
+    with ThreadPoolExecutor(max_workers=1) as extractor:
+
+        pending = None
+
+        # time spent opening this level's archive at the end of the previous one
+        extracted = 0.0
+
+        for i in range(level, last + 1):
+
+            timings = {}
+            start = time.perf_counter()
+
+            img_path = f'lvl{i}.png'
+            zip_path = f'lvl{i}.zip'
+
+            if pending is not None:
+                pending.result()
+                pending = None
+
+            # normally extracted after the previous level; a resumed run may
+            # have stopped before that
+            if not os.path.exists(img_path) and password is not None and os.path.exists(zip_path):
+                pending = extract_level(zip_path, password, extractor)
+
+            if not os.path.exists(img_path):
+                print(f'Level {i}: {img_path} not found')
+                break
+
+            timings['extract'] = extracted + time.perf_counter() - start
+
+            flag = get_flag(img_path, solver, workers, templates, learn, timings)
+            print(f'Level {i}: {flag}')
+            print('  ' + ', '.join(f'{stage} {t:.3f}s' for stage, t in timings.items()))
+
+            if learn:
+                templates.save(templates_path)
+
+            if checkpoint:
+                save_checkpoint(checkpoint, i, flag)
+
+            password = flag
+
+            # as with 7z, every flag opens the next archive, the last one included
+            start = time.perf_counter()
+
+            if pending is not None:
+                pending.result()
+                pending = None
+
+            next_zip = f'lvl{i + 1}.zip'
+            if os.path.exists(next_zip):
+                pending = extract_level(next_zip, flag, extractor)
+
+            extracted = time.perf_counter() - start
+
+        if pending is not None:
+            pending.result()
+
 def main():
 
     parser = argparse.ArgumentParser(description='First challenge')
     parser.add_argument('path', nargs='?', default=None, help='Path to input file')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='masks', help='Sudoku solver to use')
+    parser.add_argument('--benchmark', type=int, metavar='COUNT', help='Time the sudoku solvers on COUNT sparse 16x16 grids')
+    parser.add_argument('--workers', type=int, default=None, help='Threads running Tesseract on the sudoku cells')
+    parser.add_argument('--templates', default=None, help='Digit templates file; cells that match one skip Tesseract')
+    parser.add_argument('--learn', action='store_true', help='Add the digits of every solved level to --templates')
+    parser.add_argument('--checkpoint', default='checkpoint.json', help='File recording the last solved level and its password')
+    parser.add_argument('--resume', action='store_true', help='Continue after the level stored in --checkpoint')
     args = parser.parse_args()
     img_path = args.path
+    solver = SOLVERS[args.solver]
+
+    if args.learn and not args.templates:
+        parser.error('--learn needs --templates')
+
+    templates = None
+    if args.templates and os.path.exists(args.templates):
+        templates = DigitTemplates.load(args.templates)
+    elif args.learn:
+        templates = DigitTemplates()
+
+    if args.benchmark:
+        benchmark(args.benchmark, ['masks', 'dlx'] if args.solver == 'masks' else [args.solver])
+        return
 
     if img_path:
-        flag = get_flag(img_path)
+        flag = get_flag(img_path, solver, args.workers, templates, args.learn)
         print(flag)
+        if args.learn:
+            templates.save(args.templates)
         return
     
-    for i in range(1, 100):
-
-        img_path = f'lvl{i}.png'
-        zip_path = f'lvl{i+1}.zip'
-
-        flag = get_flag(img_path)
-        print(f'Level {i}: {flag}')
+    if not args.resume and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
 
-        os.system(f'7z x {zip_path} -p{flag}')
+    run_levels(1, 99, solver, args.workers, templates, args.learn, args.checkpoint, args.templates)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
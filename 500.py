@@ -1,5 +1,17 @@
 import argparse
+import glob
+import hashlib
+import io
+import json
+import operator
+import os
+import pickle
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+from functools import partial
 
 class Instruction(Enum):
     STRING = 1
@@ -52,12 +64,132 @@ instruction_set = {
     'POOL': Instruction.ENDLOOP
 }
 
+operations = {
+    Instruction.ADD: operator.add,
+    Instruction.SUB: operator.sub,
+    Instruction.MUL: operator.mul,
+    Instruction.DIV: operator.floordiv,
+    Instruction.EQUAL: operator.eq,
+    Instruction.NOT_EQUAL: operator.ne,
+    Instruction.GREATER: operator.gt,
+    Instruction.GREATER_OR_EQUAL: operator.ge,
+    Instruction.LESSER: operator.lt,
+    Instruction.LESSER_OR_EQUAL: operator.le,
+    # operator.or_/and_ are bitwise, the language short-circuits
+    Instruction.OR: lambda x, y: x or y,
+    Instruction.AND: lambda x, y: x and y
+}
+
+# shortest keyword first: decoding stops at the first keyword a prefix spells
+keyword_pattern = re.compile('|'.join(re.escape(k) for k in sorted(instruction_set, key=len)))
+
+# lexing can only fail with these; they are the only classes a token cache
+# may name, so loading one cannot run code
+LEX_ERRORS = {'IndexError': IndexError, 'ValueError': ValueError, 'ZeroDivisionError': ZeroDivisionError}
+
+class TokenUnpickler(pickle.Unpickler):
+
+    def find_class(self, module, name):
+
+        if module == 'builtins' and name in LEX_ERRORS:
+            return LEX_ERRORS[name]
+
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed in a token cache')
+
+# bytecode opcodes; every instruction is an (opcode, argument) pair. RAISE
+# holds an exception type and its args, so every run raises a new instance
+PUSH = 0
+PUSH_VAR = 1
+ASSIGN = 2
+BINARY = 3
+PRINT = 4
+BOOL = 5
+JUMP = 6
+JUMP_IF_FALSE = 7
+RAISE = 8
+BINARY_CONST = 9
+BINARY_VAR = 10
+STORE = 11
+BRANCH_CONST = 12
+VAR_CONST = 13
+BRANCH_VAR_CONST = 14
+
+opcode_names = {
+    PUSH: 'PUSH',
+    PUSH_VAR: 'PUSH_VAR',
+    ASSIGN: 'ASSIGN',
+    BINARY: 'BINARY',
+    PRINT: 'PRINT',
+    BOOL: 'BOOL',
+    JUMP: 'JUMP',
+    JUMP_IF_FALSE: 'JUMP_IF_FALSE',
+    RAISE: 'RAISE',
+    BINARY_CONST: 'BINARY_CONST',
+    BINARY_VAR: 'BINARY_VAR',
+    STORE: 'STORE',
+    BRANCH_CONST: 'BRANCH_CONST',
+    VAR_CONST: 'VAR_CONST',
+    BRANCH_VAR_CONST: 'BRANCH_VAR_CONST'
+}
+
+# the language keyword of every function a BINARY or BOOL argument can hold
+operation_keywords = {f: keyword for keyword, instruction in instruction_set.items() for i, f in operations.items() if i == instruction}
+
+def source_instructions(op, arg, scope):
+
+    # the language instructions one bytecode instruction stands for; jumps
+    # belong to the BOH or LOOP block they are compiled from
+    block = scope.rsplit(';', 1)[-1].split('@')[0]
+
+    if op == PUSH:
+        return ('N' if isinstance(arg, int) else 'B',)
+    if op == PUSH_VAR:
+        return ('V',)
+    if op == ASSIGN:
+        return ('=',)
+    if op == PRINT:
+        return ('P',)
+    if op == STORE:
+        return ('V', '=')
+    if op == BINARY or op == BOOL:
+        return (operation_keywords[arg],)
+    if op == JUMP or op == JUMP_IF_FALSE:
+        return (block,)
+    if op == BINARY_CONST:
+        return ('N' if isinstance(arg[1], int) else 'B', operation_keywords[arg[2]])
+    if op == BRANCH_CONST:
+        return ('N' if isinstance(arg[1], int) else 'B', operation_keywords[arg[2]], block)
+    if op == BINARY_VAR:
+        return ('V', operation_keywords[arg[2]])
+    if op == VAR_CONST:
+        return ('V', 'N' if isinstance(arg[3], int) else 'B', operation_keywords[arg[4]])
+    if op == BRANCH_VAR_CONST:
+        return ('V', 'N' if isinstance(arg[3], int) else 'B', operation_keywords[arg[4]], block)
+
+    return ()
+
 class Interpreter:
     
-    def __init__(self):
+    def __init__(self, output=None, buffer_size=1 << 16):
 
         self.stack = []
         self.memo = {}
+        self.lexicon = {}
+
+        # printed values are collected in chunks and written to output
+        # (stdout when None) once buffer_size characters pile up
+        self.output = output
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+
+        self.steps = 0
+
+        # compiled programs keep variables in slots; symbols maps every key
+        # the program names to its slot
+        self.symbols = {}
+        self.slots = []
+        self.declared = set()
 
         self. int_op = {
             'a': Instruction.ADD,
@@ -66,13 +198,48 @@ class Interpreter:
             'd': Instruction.DIV
         }
 
-    def parse(self, path):
+    def write(self, text):
+
+        self.buffer.append(text)
+        self.buffered += len(text)
+
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+
+        if self.buffer:
+            output = sys.stdout if self.output is None else self.output
+            output.write(''.join(self.buffer))
+            self.buffer.clear()
+            self.buffered = 0
+
+    def capture(self, code, tree_walk=False):
+
+        output = self.output
+        captured = self.output = io.StringIO()
+
+        try:
+            if tree_walk:
+                self.solve(code)
+            else:
+                self.execute(self.compile(code))
+        finally:
+            self.flush()
+            self.output = output
+
+        return captured.getvalue()
+
+    def parse(self, path, lines=None):
 
         with open(path, 'r') as f:
-            lines = f.readlines()
+            return self.parse_source(f.read(), lines)
+
+    def parse_source(self, source, lines=None):
 
+        # lines, when given, gets the source line number of every token
         code = []
-        for line in lines:
+        for number, line in enumerate(io.StringIO(source).readlines(), 1):
             
             line = line.strip()
 
@@ -87,23 +254,12 @@ class Interpreter:
             for instruction in instructions[::-1]:
                 code.append(instruction)
 
+            if lines is not None:
+                lines.extend([number] * len(instructions))
+
         return code
 
     def operate(self, a, b, op):
-        operations = {
-            Instruction.ADD: lambda x, y: x + y,
-            Instruction.SUB: lambda x, y: x - y,
-            Instruction.MUL: lambda x, y: x * y,
-            Instruction.DIV: lambda x, y: x // y,
-            Instruction.EQUAL: lambda x, y: x == y,
-            Instruction.NOT_EQUAL: lambda x, y: x != y,
-            Instruction.GREATER: lambda x, y: x > y,
-            Instruction.GREATER_OR_EQUAL: lambda x, y: x >= y,
-            Instruction.LESSER: lambda x, y: x < y,
-            Instruction.LESSER_OR_EQUAL: lambda x, y: x <= y,
-            Instruction.OR: lambda x, y: x or y,
-            Instruction.AND: lambda x, y: x and y
-        }
         return operations[op](a, b)
 
     def top(self, get_repr=False):
@@ -112,8 +268,10 @@ class Interpreter:
             top = self.memo[top]
         return top
 
-    def pop(self):
+    def pop(self, get_repr=False):
+        top = self.top(get_repr)
         self.stack.pop()
+        return top
 
     def push(self, val):
         self.stack.append(val)
@@ -132,20 +290,14 @@ class Interpreter:
 
             self.solve([code[lc]])
 
-            a = self.top()
-            self.pop()
-
-            b = self.top()
-            self.pop()
+            a = self.pop()
+            b = self.pop()
 
             self.push(self.operate(a, b, op))
 
             lc += 1
 
-        condition = self.top()
-        self.pop()
-
-        return condition
+        return self.pop()
 
     def solve(self, code):
 
@@ -331,43 +483,1000 @@ class Interpreter:
 
                     elif instruction == Instruction.ASSIGN:
 
-                        v = self.top(get_repr=True)
-                        self.pop()
-
-                        self.memo[v] = self.top()
-                        self.pop()
+                        v = self.pop(get_repr=True)
+                        self.memo[v] = self.pop()
 
                     elif instruction in [Instruction.ADD, Instruction.SUB, Instruction.MUL, Instruction.DIV,
                                         Instruction.EQUAL, Instruction.NOT_EQUAL, Instruction.GREATER, Instruction.GREATER_OR_EQUAL, Instruction.LESSER, Instruction.LESSER_OR_EQUAL]:
 
-                        b = self.top()
-                        self.pop()
-
-                        a = self.top()
-                        self.pop()
+                        b = self.pop()
+                        a = self.pop()
 
                         self.push(self.operate(a, b, instruction))
 
                     elif instruction == Instruction.PRINT:
 
-                        val = self.top()
-                        self.pop()
-                        print(val, end='')
+                        self.write(str(self.pop()))
+
+            lc += 1
+
+    def compile(self, code, lines=None):
+
+        # the source line and enclosing BOH/LOOP blocks of every instruction,
+        # and the span of every condition, for the profiler
+        self.line_table = []
+        self.scope_table = []
+        self.conditions = []
+        self.scope = 'program'
+
+        bytecode = []
+        self.compile_block(code, bytecode, [None] * len(code) if lines is None else lines)
+        self.link(bytecode)
+
+        return bytecode
+
+    def mark(self, bytecode, line):
+
+        n = len(bytecode) - len(self.line_table)
+        self.line_table.extend([line] * n)
+        self.scope_table.extend([self.scope] * n)
+
+    def slot(self, key):
+
+        k = self.symbols.get(key)
+
+        if k is None:
+            k = self.symbols[key] = len(self.slots)
+            self.slots.append(None)
+
+        return k
+
+    def link(self, bytecode):
+
+        # names and constant operands become slot indices; the keys stay
+        # alongside as the value an unset slot reads as
+        for pc, (op, arg) in enumerate(bytecode):
+
+            if op == PUSH_VAR:
+                bytecode[pc] = (op, (self.slot(arg), arg))
+            elif op == STORE:
+                bytecode[pc] = (op, self.slot(arg))
+            elif op == BINARY_CONST or op == BRANCH_CONST or op == BINARY_VAR:
+                bytecode[pc] = (op, (self.slot(arg[0]),) + arg)
+            elif op == VAR_CONST or op == BRANCH_VAR_CONST:
+                bytecode[pc] = (op, (self.slot(arg[0]), arg[0], self.slot(arg[1])) + arg[1:])
+
+    def compile_block(self, code, bytecode, lines):
+
+        # mirrors solve(): bodies are cut out of the token list exactly the
+        # same way, but only once, and errors are replayed when reached
+        lc = 0
+
+        while lc < len(code):
+
+            line = code[lc]
+
+            if line in instruction_set:
+
+                instruction = instruction_set[line]
+                number = lines[lc]
+                scope = self.scope
+
+                if instruction == Instruction.IF:
+
+                    try:
+                        condition, true_code, false_code, lc, condition_lines, true_lines, false_lines = self.split_if(code, lc, lines)
+                    except Exception as e:
+                        bytecode.append((RAISE, (type(e), e.args)))
+                        self.mark(bytecode, number)
+                        return
+
+                    self.scope = f'{scope};BOH@{number}'
+
+                    start = len(bytecode)
+                    self.compile_condition(condition, bytecode, condition_lines)
+                    self.mark(bytecode, number)
+
+                    branch = self.branch(bytecode, start)
+                    self.mark(bytecode, number)
+                    self.conditions.append((start, branch))
+                    self.compile_block(true_code, bytecode, true_lines)
+
+                    skip = len(bytecode)
+                    bytecode.append(None)
+                    self.mark(bytecode, number)
+                    self.patch(bytecode, branch, len(bytecode))
+                    self.compile_block(false_code, bytecode, false_lines)
+
+                    bytecode[skip] = (JUMP, len(bytecode))
+
+                elif instruction == Instruction.LOOP:
+
+                    try:
+                        condition, loop_code, lc, condition_lines, loop_lines = self.split_loop(code, lc, lines)
+                    except Exception as e:
+                        bytecode.append((RAISE, (type(e), e.args)))
+                        self.mark(bytecode, number)
+                        return
+
+                    self.scope = f'{scope};LOOP@{number}'
+
+                    start = len(bytecode)
+                    self.compile_condition(condition, bytecode, condition_lines)
+                    self.mark(bytecode, number)
+
+                    branch = self.branch(bytecode, start)
+                    self.mark(bytecode, number)
+                    self.conditions.append((start, branch))
+                    self.compile_block(loop_code, bytecode, loop_lines)
+
+                    bytecode.append((JUMP, start))
+                    self.mark(bytecode, number)
+                    self.patch(bytecode, branch, len(bytecode))
+
+                self.scope = scope
+
+            else:
+                self.compile_line(line, bytecode)
+                self.mark(bytecode, lines[lc])
+
+            lc += 1
+
+    def branch(self, bytecode, start):
+
+        # a condition ending in a comparison with a constant tests and jumps
+        # in one instruction; the jump target is filled in by patch()
+        if len(bytecode) > start and bytecode[-1][0] == BINARY_CONST:
+            bytecode[-1] = (BRANCH_CONST, bytecode[-1][1])
+        elif len(bytecode) > start and bytecode[-1][0] == VAR_CONST:
+            bytecode[-1] = (BRANCH_VAR_CONST, bytecode[-1][1])
+        else:
+            bytecode.append((JUMP_IF_FALSE, None))
+
+        return len(bytecode) - 1
+
+    def patch(self, bytecode, branch, target):
+
+        op, arg = bytecode[branch]
+
+        if op == BRANCH_CONST or op == BRANCH_VAR_CONST:
+            bytecode[branch] = (op, arg + (target,))
+        else:
+            bytecode[branch] = (op, target)
+
+    def split_if(self, code, lc, lines):
+
+        cond_lc = lc + 1
+
+        condition, condition_lines = [], []
+        while code[cond_lc] != '|':
+            condition.append(code[cond_lc])
+            condition_lines.append(lines[cond_lc])
+            cond_lc += 1
+
+        cond_lc += 1
+
+        true_code, true_lines = [], []
+
+        depth = 1
+
+        while depth > 0:
+
+            if code[cond_lc] in instruction_set:
+
+                instruction = instruction_set[code[cond_lc]]
+
+                if (instruction == Instruction.ELSE or instruction == Instruction.ENDIF) and depth == 1:
+                    break
+
+                if instruction == Instruction.IF:
+                    depth += 1
+
+                if instruction == Instruction.ENDIF:
+                    depth -= 1
+
+            true_code.append(code[cond_lc])
+            true_lines.append(lines[cond_lc])
+            cond_lc += 1
+
+        false_code, false_lines = [], []
+
+        if instruction_set[code[cond_lc]] == Instruction.ELSE:
+
+            false_code, false_lines = ['BOH'], [lines[cond_lc]]
+
+            cond_lc += 1
+
+            depth = 1
+
+            while depth > 0:
+
+                if code[cond_lc] in instruction_set:
+
+                    instruction = instruction_set[code[cond_lc]]
+
+                    if instruction == Instruction.ENDELSE and depth == 1:
+                        break
+
+                    if instruction == Instruction.IF:
+                        depth += 1
+
+                    if instruction == Instruction.ENDIF:
+                        depth -= 1
+
+                false_code.append(code[cond_lc])
+                false_lines.append(lines[cond_lc])
+                cond_lc += 1
+
+            false_code.append('HOB')
+            false_lines.append(false_lines[0])
+
+            cond_lc += 1
+
+        return condition, true_code, false_code, cond_lc, condition_lines, true_lines, false_lines
+
+    def split_loop(self, code, lc, lines):
+
+        loop_lc = lc + 1
+
+        condition, condition_lines = [], []
+        while code[loop_lc] != '|':
+            condition.append(code[loop_lc])
+            condition_lines.append(lines[loop_lc])
+            loop_lc += 1
+
+        loop_lc += 1
+
+        loop_code, loop_lines = [], []
+
+        depth = 1
+
+        while depth > 0:
+
+            if code[loop_lc] in instruction_set:
+
+                instruction = instruction_set[code[loop_lc]]
+
+                if instruction == Instruction.ENDLOOP and depth == 1:
+                    break
+
+                if instruction == Instruction.ENDLOOP:
+                    depth -= 1
+
+                if instruction == Instruction.LOOP:
+                    depth += 1
+
+            loop_code.append(code[loop_lc])
+            loop_lines.append(lines[loop_lc])
+            loop_lc += 1
+
+        return condition, loop_code, loop_lc, condition_lines, loop_lines
+
+    def compile_condition(self, code, bytecode, lines):
+
+        if not code:
+            bytecode.append((RAISE, (IndexError, ('list index out of range',))))
+            return
+
+        self.compile_block([code[0]], bytecode, lines[:1])
+
+        lc = 1
+
+        while lc < len(code) and code[lc] in instruction_set and (instruction_set[code[lc]] == Instruction.OR or instruction_set[code[lc]] == Instruction.AND):
+
+            op = instruction_set[code[lc]]
+            lc += 1
+
+            if lc == len(code):
+                bytecode.append((RAISE, (IndexError, ('list index out of range',))))
+                return
+
+            self.compile_block([code[lc]], bytecode, lines[lc:lc + 1])
+            bytecode.append((BOOL, operations[op]))
+            self.mark(bytecode, lines[lc - 1])
 
             lc += 1
 
+    def compile_line(self, line, bytecode):
+
+        tokens = self.lexicon.get(line)
+        if tokens is None:
+            tokens = self.lexicon[line] = self.lex_word(line)
+
+        ops = []
+
+        for keyword, value in tokens:
+
+            if keyword is None:
+                ops.append((RAISE, value))
+            elif keyword == 'B' or keyword == 'N':
+                ops.append((PUSH, value))
+            elif keyword == 'V':
+                ops.append((PUSH_VAR, value))
+            elif keyword == '=':
+                ops.append((ASSIGN, None))
+            elif keyword == 'P':
+                ops.append((PRINT, None))
+            else:
+                ops.append((BINARY, operations[instruction_set[keyword]]))
+
+        # a word is straight-line code, so a push feeding straight into the
+        # next instruction can be folded into it
+        fused = []
+
+        for op, arg in ops:
+
+            if fused and fused[-1][0] in (PUSH, PUSH_VAR):
+
+                last, value = fused[-1]
+
+                if op == BINARY:
+                    fused[-1] = (BINARY_CONST if last == PUSH else BINARY_VAR, (value, arg))
+                    if last == PUSH and len(fused) > 1 and fused[-2][0] == PUSH_VAR:
+                        fused[-2:] = [(VAR_CONST, (fused[-2][1], value, arg))]
+                    continue
+
+                if op == ASSIGN and last == PUSH_VAR:
+                    fused[-1] = (STORE, value)
+                    continue
+
+            fused.append((op, arg))
+
+        bytecode.extend(fused)
+
+    def lex(self, code):
+
+        lexicon = {}
+
+        for word in code:
+            if word not in instruction_set and word not in lexicon:
+                lexicon[word] = self.lex_word(word)
+
+        self.lexicon.update(lexicon)
+
+        return lexicon
+
+    def lex_word(self, line):
+
+        # typed tokens are (keyword, value) pairs; literals are already
+        # decoded and int chains folded, a failing decode becomes a
+        # (None, (exception type, args)) token raised once execution reaches it
+        tokens = []
+        pc = 0
+
+        try:
+
+            while pc < len(line):
+
+                match = keyword_pattern.match(line, pc)
+                if match is None:
+                    raise IndexError('string index out of range')
+
+                keyword = match.group()
+                pc = match.end()
+
+                if keyword == 'B' or keyword == 'V':
+
+                    end = pc
+                    while not line[end].isupper() and line[end] != '=':
+                        end += 2
+
+                    s = line[pc:end:2]
+                    pc = end
+
+                    tokens.append(('B', s[::-1]) if keyword == 'B' else ('V', '$' + s))
+
+                elif keyword == 'N':
+
+                    end = pc
+                    while line[end].isdigit():
+                        end += 1
+
+                    lhs = line[pc:end]
+                    pc = end
+
+                    while line[pc] in self.int_op:
+
+                        op = line[pc]
+                        pc += 1
+
+                        end = pc
+                        while line[end].isdigit():
+                            end += 1
+
+                        rhs = line[pc:end]
+                        pc = end
+
+                        lhs = self.operate(int(lhs), int(rhs), self.int_op[op])
+
+                    tokens.append(('N', int(lhs)))
+
+                elif keyword in ('=', 'P', 'ADD', 'SUB', 'MUL', 'DIV', 'QE', 'EN', 'TG', 'EG', 'TL', 'EL'):
+                    tokens.append((keyword, None))
+
+        except Exception as e:
+            tokens.append((None, (type(e), e.args)))
+
+        return tuple(tokens)
+
+    def load(self, path, cache_dir=None):
+
+        with open(path, 'r') as f:
+            source = f.read()
+
+        if cache_dir is None:
+            code = self.parse_source(source)
+            self.lex(code)
+            return code
+
+        cache_path = os.path.join(cache_dir, hashlib.sha256(source.encode()).hexdigest() + '.v2.tokens')
+
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                code, lexicon = TokenUnpickler(f).load()
+            self.lexicon.update(lexicon)
+            return code
+
+        code = self.parse_source(source)
+        lexicon = self.lex(code)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path + '.tmp', 'wb') as f:
+            pickle.dump((code, lexicon), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + '.tmp', cache_path)
+
+        return code
+
+    def execute(self, bytecode, max_steps=None, timeout=None, profile=None):
+
+        stack = self.stack
+        symbols = self.symbols
+        slots = self.slots
+        declared = self.declared
+
+        for key, val in self.memo.items():
+            k = self.slot(key)
+            slots[k] = val
+            declared.add(k)
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        try:
+            if profile is None:
+                self.dispatch(bytecode, stack, symbols, slots, declared, max_steps, deadline)
+            else:
+                self.profile_dispatch(bytecode, stack, symbols, slots, declared, max_steps, deadline, profile)
+        finally:
+            self.flush()
+            memo = self.memo
+            for key, k in symbols.items():
+                if k in declared or slots[k] is not None:
+                    memo[key] = slots[k]
+
+    def limit(self, steps, max_steps, deadline):
+
+        if max_steps is not None and steps > max_steps:
+            raise RuntimeError(f'step limit of {max_steps} exceeded')
+
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TimeoutError('time limit exceeded')
+
+        # the clock is read every few thousand steps, not on every jump
+        check = float('inf') if deadline is None else steps + 10000
+        if max_steps is not None:
+            check = min(check, max_steps + 1)
+
+        return check
+
+    def dispatch(self, bytecode, stack, symbols, slots, declared, max_steps=None, deadline=None):
+
+        # opcodes as locals, most frequent first: global lookups and long
+        # comparison chains would dominate the dispatch
+        var_const, store, branch_var_const, jump, push_var, binary_var = VAR_CONST, STORE, BRANCH_VAR_CONST, JUMP, PUSH_VAR, BINARY_VAR
+        binary_const, branch_const, jump_if_false = BINARY_CONST, BRANCH_CONST, JUMP_IF_FALSE
+        push, binary, assign, print_, bool_ = PUSH, BINARY, ASSIGN, PRINT, BOOL
+        pop, append, lookup, declare, write = stack.pop, stack.append, symbols.get, declared.add, self.write
+
+        # straight-line runs are only counted when control leaves them, and
+        # limits are only checked on jumps, so the loop pays for neither
+        steps = 0
+        check = self.limit(steps, max_steps, deadline)
+
+        pc = mark = 0
+        end = len(bytecode)
+
+        try:
+
+            while pc < end:
+
+                op, arg = bytecode[pc]
+                pc += 1
+
+                # a value naming a variable that holds something reads as that
+                # value; an unset variable is declared the first time it is read
+                if op == var_const:
+                    ka, a, kb, b, f = arg
+                    val = slots[ka]
+                    if val is None:
+                        declare(ka)
+                    else:
+                        a = val
+                    val = slots[kb]
+                    if val is not None:
+                        b = val
+                    append(f(a, b))
+
+                elif op == store:
+                    if not stack:
+                        declare(arg)
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    slots[arg] = a
+
+                elif op == branch_var_const:
+                    ka, a, kb, b, f, target = arg
+                    val = slots[ka]
+                    if val is None:
+                        declare(ka)
+                    else:
+                        a = val
+                    val = slots[kb]
+                    if val is not None:
+                        b = val
+                    a = f(a, b)
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    if not a:
+                        steps += pc - mark
+                        pc = mark = target
+
+                elif op == jump:
+                    steps += pc - mark
+                    pc = mark = arg
+                    if steps >= check:
+                        check = self.limit(steps, max_steps, deadline)
+
+                elif op == binary_const:
+                    kb, b, f = arg
+                    val = slots[kb]
+                    if val is not None:
+                        b = val
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    append(f(a, b))
+
+                elif op == push_var:
+                    k, v = arg
+                    if slots[k] is None:
+                        declare(k)
+                    append(v)
+
+                elif op == branch_const:
+                    kb, b, f, target = arg
+                    val = slots[kb]
+                    if val is not None:
+                        b = val
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    a = f(a, b)
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    if not a:
+                        steps += pc - mark
+                        pc = mark = target
+
+                elif op == jump_if_false:
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    if not a:
+                        steps += pc - mark
+                        pc = mark = arg
+
+                elif op == binary_var:
+                    kb, b, f = arg
+                    val = slots[kb]
+                    if val is None:
+                        declare(kb)
+                    else:
+                        b = val
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    append(f(a, b))
+
+                elif op == push:
+                    append(arg)
+
+                elif op == binary:
+                    b = pop()
+                    k = lookup(b)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            b = val
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    append(arg(a, b))
+
+                elif op == assign:
+                    v = pop()
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    slots[self.slot(v)] = a
+
+                elif op == print_:
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    write(str(a))
+
+                elif op == bool_:
+                    a = pop()
+                    k = lookup(a)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            a = val
+                    b = pop()
+                    k = lookup(b)
+                    if k is not None:
+                        val = slots[k]
+                        if val is not None:
+                            b = val
+                    append(arg(a, b))
+
+                else:
+                    error, args = arg
+                    raise error(*args)
+
+        finally:
+            self.steps += steps + pc - mark
+
+        return pc
+
+    def profile_dispatch(self, bytecode, stack, symbols, slots, declared, max_steps, deadline, profile):
+
+        # every instruction runs as a one-instruction program through
+        # dispatch(); a taken jump there lands on 2, its real target is kept
+        # aside, so dispatch() itself needs no hooks
+        programs = []
+        targets = []
+
+        for op, arg in bytecode:
+
+            target = None
+
+            if op == JUMP or op == JUMP_IF_FALSE:
+                target, arg = arg, 2
+            elif op == BRANCH_CONST or op == BRANCH_VAR_CONST:
+                target, arg = arg[-1], arg[:-1] + (2,)
+
+            programs.append([(op, arg)])
+            targets.append(target)
+
+        conditions = dict(self.conditions)
+        counts = [0] * len(bytecode)
+        line_table = self.line_table
+        steps = self.steps
+        clock = time.perf_counter
+
+        start = clock()
+        condition_start = condition_end = None
+        pc = 0
+        end = len(bytecode)
+
+        try:
+
+            while pc < end:
+
+                if pc in conditions:
+                    condition_start, condition_end = clock(), conditions[pc]
+
+                counts[pc] += 1
+
+                if self.dispatch(programs[pc], stack, symbols, slots, declared) == 2:
+
+                    target = targets[pc]
+
+                    # only the jump closing a LOOP body goes backwards
+                    if target < pc:
+                        profile.loops[line_table[pc]] = profile.loops.get(line_table[pc], 0) + 1
+                        self.limit(self.steps - steps, max_steps, deadline)
+
+                else:
+                    target = pc + 1
+
+                profile.peak_stack = max(profile.peak_stack, len(stack))
+
+                if pc == condition_end:
+                    profile.condition_time += clock() - condition_start
+                    condition_end = None
+
+                pc = target
+
+        finally:
+            profile.time += clock() - start
+            profile.steps += self.steps - steps
+            profile.add(bytecode, counts, line_table, self.scope_table)
+
+def by_line(item):
+    return -1 if item[0] is None else item[0]
+
+class Profile:
+
+    __slots__ = ('opcodes', 'instructions', 'lines', 'loops', 'stacks', 'peak_stack', 'condition_time', 'steps', 'time')
+
+    def __init__(self):
+
+        # opcodes counts bytecode instructions, with the operator they apply;
+        # instructions counts the language instructions those stand for.
+        # lines and loops are keyed by source line; stacks by the chain of
+        # enclosing blocks and the line, as a flame graph frame
+        self.opcodes = {}
+        self.instructions = {}
+        self.lines = {}
+        self.loops = {}
+        self.stacks = {}
+        self.peak_stack = 0
+        self.condition_time = 0.0
+        self.steps = 0
+        self.time = 0.0
+
+    def add(self, bytecode, counts, line_table, scope_table):
+
+        for (op, arg), count, line, scope in zip(bytecode, counts, line_table, scope_table):
+
+            if not count:
+                continue
+
+            keywords = source_instructions(op, arg, scope)
+
+            name = opcode_names[op]
+            if op in (BINARY, BOOL, BINARY_CONST, BRANCH_CONST, BINARY_VAR, VAR_CONST, BRANCH_VAR_CONST):
+                name += ' ' + keywords[-2 if op in (BRANCH_CONST, BRANCH_VAR_CONST) else -1]
+
+            self.opcodes[name] = self.opcodes.get(name, 0) + count
+
+            for keyword in keywords:
+                self.instructions[keyword] = self.instructions.get(keyword, 0) + count
+
+            self.lines[line] = self.lines.get(line, 0) + count
+
+            frame = f'{scope};line {line}'
+            self.stacks[frame] = self.stacks.get(frame, 0) + count
+
+    def report(self):
+
+        return {
+            'steps': self.steps,
+            'time': round(self.time, 6),
+            'condition_time': round(self.condition_time, 6),
+            'peak_stack': self.peak_stack,
+            'opcodes': dict(sorted(self.opcodes.items(), key=lambda item: -item[1])),
+            'instructions': dict(sorted(self.instructions.items(), key=lambda item: -item[1])),
+            'lines': {str(line): count for line, count in sorted(self.lines.items(), key=by_line)},
+            'loops': {str(line): count for line, count in sorted(self.loops.items(), key=by_line)}
+        }
+
+    def collapsed(self):
+        return ''.join(f'{frame} {count}\n' for frame, count in self.stacks.items())
+
+    def save(self, path, format='json'):
+
+        with open(path, 'w') as f:
+            if format == 'collapsed':
+                f.write(self.collapsed())
+            else:
+                json.dump(self.report(), f, indent=2)
+
+class Result:
+
+    __slots__ = ('output', 'error', 'steps', 'time', 'stack', 'memo')
+
+    def __init__(self, output, error, steps, time, stack, memo):
+
+        # error is the exception that stopped the program, None if it ran
+        # to the end; output holds everything printed before that
+        self.output = output
+        self.error = error
+        self.steps = steps
+        self.time = time
+        self.stack = stack
+        self.memo = memo
+
+# bytecode and symbol table of the most recently compiled programs, by the
+# SHA-256 of their source
+compile_cache = {}
+COMPILE_CACHE_SIZE = 1024
+
+def compile_source(source):
+
+    key = hashlib.sha256(source.encode()).hexdigest()
+    program = compile_cache.get(key)
+
+    if program is None:
+        interpreter = Interpreter()
+        bytecode = interpreter.compile(interpreter.parse_source(source))
+        program = compile_cache[key] = (bytecode, interpreter.symbols)
+
+        if len(compile_cache) > COMPILE_CACHE_SIZE:
+            del compile_cache[next(iter(compile_cache))]
+
+    return program
+
+def run(source, *, max_steps=None, timeout=None):
+
+    start = time.perf_counter()
+
+    output = io.StringIO()
+    interpreter = Interpreter(output)
+    error = None
+
+    try:
+        bytecode, symbols = compile_source(source)
+        interpreter.symbols = dict(symbols)
+        interpreter.slots = [None] * len(symbols)
+        interpreter.execute(bytecode, max_steps, timeout)
+    except Exception as e:
+        error = e
+
+    return Result(output.getvalue(), error, interpreter.steps, time.perf_counter() - start, interpreter.stack, interpreter.memo)
+
+def find_programs(pattern):
+
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+
+    for path in sorted(glob.iglob(pattern)):
+        if os.path.isfile(path):
+            yield path
+
+def run_file(path, max_steps=None, timeout=None):
+
+    with open(path, 'r') as f:
+        result = run(f.read(), max_steps=max_steps, timeout=timeout)
+
+    error = None
+    if result.error is not None:
+        error = f'{type(result.error).__name__}: {result.error}'
+
+    return {'path': path, 'output': result.output, 'error': error, 'steps': result.steps, 'time': round(result.time, 6)}
+
+def batch(pattern, workers, out, max_steps=None, timeout=None):
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(partial(run_file, max_steps=max_steps, timeout=timeout), find_programs(pattern), chunksize=16):
+            out.write(json.dumps(result) + '\n')
+
+def loop_program(iterations):
+
+    # sums 0..iterations-1 with a nested branch in the body
+    return '\n'.join([
+        'N0Viq=',
+        'N0Vsq=',
+        'LOOP',
+        f'ViqN{iterations}TL',
+        '|',
+        'VsqViqADDVsq=',
+        'BOH',
+        f'ViqN{iterations // 2}TL',
+        '|',
+        'VsqN1ADDVsq=',
+        'OH',
+        'N1N1QE',
+        '|',
+        'VsqN1SUBVsq=',
+        'HO',
+        'HOB',
+        'ViqN1ADDViq=',
+        'POOL',
+        'VsqP'
+    ])
+
+def benchmark(iterations, tree_walk=False):
+
+    print(f'loop of {iterations} iterations')
+
+    modes = ['compiled', 'tree-walk'] if tree_walk else ['compiled']
+
+    for mode in modes:
+
+        interpreter = Interpreter()
+        code = interpreter.parse_source(loop_program(iterations))
+
+        start = time.perf_counter()
+        printed = interpreter.capture(code, mode == 'tree-walk')
+        elapsed = time.perf_counter() - start
+
+        print(f'{mode}: {elapsed:.3f}s (printed {printed})')
+
 def main():
 
     parser = argparse.ArgumentParser(description='First challenge')
-    parser.add_argument('path', help='Path to input file')
+    parser.add_argument('path', nargs='?', default=None, help='Path to input file')
+    parser.add_argument('--tree-walk', action='store_true', help='Interpret the token list directly instead of compiling it')
+    parser.add_argument('--token-cache', metavar='DIR', help='Directory to cache lexed programs in, keyed by content hash')
+    parser.add_argument('--buffer-size', type=int, default=1 << 16, metavar='CHARS', help='Characters of output to collect before writing them out')
+    parser.add_argument('--max-steps', type=int, default=None, help='Stop compiled programs after this many executed instructions')
+    parser.add_argument('--timeout', type=float, default=None, help='Stop compiled programs after this many seconds')
+    parser.add_argument('--batch', metavar='PATTERN', help='Run every program in a directory or glob, one JSON line each')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --batch')
+    parser.add_argument('--output', default=None, help='Write --batch results to this file instead of stdout')
+    parser.add_argument('--profile', metavar='PATH', help='Profile the compiled program and write the report to PATH')
+    parser.add_argument('--profile-format', choices=['json', 'collapsed'], default='json', help='JSON counters, or collapsed stacks for flame graph tools')
+    parser.add_argument('--benchmark', type=int, metavar='ITERATIONS', help='Time a loop-heavy program running ITERATIONS iterations; with --tree-walk both interpreters are timed')
     args = parser.parse_args()
     path = args.path
 
-    interpreter = Interpreter()
-
-    code = interpreter.parse(path)
-
-    interpreter.solve(code)
+    if args.benchmark:
+        benchmark(args.benchmark, args.tree_walk)
+        return
+
+    if args.batch:
+        if args.output:
+            with open(args.output, 'w') as out:
+                batch(args.batch, args.workers, out, args.max_steps, args.timeout)
+        else:
+            batch(args.batch, args.workers, sys.stdout, args.max_steps, args.timeout)
+        return
+
+    if not path:
+        parser.error('path is required')
+
+    interpreter = Interpreter(buffer_size=args.buffer_size)
+
+    if args.tree_walk:
+        try:
+            interpreter.solve(interpreter.parse(path))
+        finally:
+            interpreter.flush()
+    elif args.profile:
+        lines = []
+        code = interpreter.parse(path, lines)
+        profile = Profile()
+        try:
+            interpreter.execute(interpreter.compile(code, lines), args.max_steps, args.timeout, profile)
+        finally:
+            profile.save(args.profile, args.profile_format)
+    else:
+        code = interpreter.load(path, args.token_cache)
+        interpreter.execute(interpreter.compile(code), args.max_steps, args.timeout)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file